@@ -6,6 +6,14 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+
+from utils.indexes import ensure_indexes_once
+from utils.repository import ensure_rollups_once
+
+# 🗂️ Create any missing MongoDB indexes and build the rollups of existing history (once per server process)
+ensure_indexes_once()
+ensure_rollups_once()
+
 # Check if the user is logged in
 
 if "user" not in st.session_state:
@@ -0,0 +1,50 @@
+"""Per-rerun MongoDB connection overhead: a new MongoClient per rerun vs the pooled client.
+
+Needs a reachable server in MONGO_URI (.env or environment):
+
+    python -m benchmarks.bench_connections --reruns 50
+"""
+import argparse
+import statistics
+import time
+
+from pymongo import MongoClient
+
+from utils.db import MONGO_URI, get_client
+
+
+def per_rerun_client():
+    """What the map pages used to do on every rerun."""
+    client = MongoClient(MONGO_URI)
+    try:
+        client["koral"]["listeria"].find_one({}, {"_id": 1})
+    finally:
+        client.close()
+
+
+def pooled_client():
+    get_client()["koral"]["listeria"].find_one({}, {"_id": 1})
+
+
+def timed(fn, reruns):
+    samples = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=50)
+    args = parser.parse_args()
+
+    pooled_client()  # warm the pool once, as the first page load would
+    for name, fn in [("new client per rerun", per_rerun_client), ("pooled client", pooled_client)]:
+        samples = timed(fn, args.reruns)
+        print(f"{name:22s}: median {statistics.median(samples):7.2f} ms, max {max(samples):7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
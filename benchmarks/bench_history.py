@@ -0,0 +1,76 @@
+"""Compare the row-wise hover history (old map pages) with utils.history.HoverHistory.
+
+    python -m benchmarks.bench_history --points 300 --days 365
+"""
+import argparse
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.history import HoverHistory
+
+
+def synthetic_samples(n_points, n_days, positivity=0.1, seed=0):
+    """One sample per point per day, with a few unknown results."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2024-01-01", periods=n_days, freq="D").date
+    df = pd.DataFrame({
+        "points": np.repeat([str(p) for p in range(n_points)], n_days),
+        "sample_date": np.tile(dates, n_points),
+    })
+    value = (rng.random(len(df)) < positivity).astype(float)
+    value[rng.random(len(df)) < 0.01] = np.nan
+    df["value"] = value
+    return df
+
+
+def rowwise_history(df, selected_date, window=28):
+    """The per-row apply the map pages used before HoverHistory."""
+    recent_data = df[(df['sample_date'] >= selected_date - timedelta(days=window - 1))
+                     & (df['sample_date'] <= selected_date)]
+    return recent_data.groupby('points').apply(
+        lambda x: "<br>&nbsp;&nbsp;".join(
+            x.sort_values('sample_date', ascending=False).apply(
+                lambda row: f"{row['sample_date']}: "
+                + ('<b style="color:red">Detected</b>' if row['value'] == 1
+                   else '<b style="color:green">Not Detected</b>' if row['value'] == 0
+                   else 'Unknown'),
+                axis=1))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=300)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--lookups", type=int, default=5)
+    args = parser.parse_args()
+
+    df = synthetic_samples(args.points, args.days)
+    dates = sorted(df["sample_date"].unique(), reverse=True)[:args.lookups]
+    print(f"{len(df):,} samples, {args.points} points, {args.days} days")
+
+    start = time.perf_counter()
+    history = HoverHistory(df)
+    build = time.perf_counter() - start
+
+    old_total = new_total = 0.0
+    for date in dates:
+        start = time.perf_counter()
+        old = rowwise_history(df, date)
+        old_total += time.perf_counter() - start
+
+        start = time.perf_counter()
+        new = history.for_date(date)
+        new_total += time.perf_counter() - start
+
+        assert old.to_dict() == new.to_dict(), f"history differs on {date}"
+
+    print(f"row-wise apply : {old_total / len(dates) * 1000:9.1f} ms per date")
+    print(f"HoverHistory   : {new_total / len(dates) * 1000:9.1f} ms per date (+{build * 1000:.1f} ms one-off build)")
+
+
+if __name__ == "__main__":
+    main()
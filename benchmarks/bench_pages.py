@@ -0,0 +1,230 @@
+"""Time data load, aggregation and figure build of every dashboard page on synthetic data.
+
+Runs against an in-memory mongomock by default, or a local mongod (the
+benchmark database is dropped and refilled, so never point it at production).
+mongomock runs every query in pure Python and its reads slow down sharply
+with collection size (100k rows take minutes), so use it for quick relative
+comparisons and a local mongod for the 1M-row run:
+
+    python -m benchmarks.bench_pages --sizes 10000 100000 --output bench.json
+    python -m benchmarks.bench_pages --backend mongod --uri mongodb://localhost:27017 --compare bench.json
+
+Every stage reports the median of --repeat runs in seconds. With --compare
+the stages that got slower than --threshold times the old report are
+listed and the exit code is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+BENCH_DB_NAME = "koral_bench"
+INSERT_BATCH = 10000
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def use_backend(backend, uri):
+    """Point utils.db at the benchmark database; must run before anything imports utils."""
+    os.environ["MONGO_DB_NAME"] = BENCH_DB_NAME
+    os.environ["MONGO_CREATE_INDEXES"] = "true"
+    if backend == "mongomock":
+        import mongomock
+        import pymongo
+
+        mock = mongomock.MongoClient()
+        pymongo.MongoClient = lambda *args, **kwargs: mock
+    else:
+        os.environ["MONGO_URI"] = uri
+
+
+def timed(fn, repeat):
+    """(median seconds, last result) of repeat calls."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def load_dataset(n_rows, backend):
+    """Replace the benchmark collections with n_rows synthetic results; returns the ingest time."""
+    from benchmarks.synthetic import synthetic_upload
+    from utils.db import db, listeria_collection
+    from utils.indexes import ensure_indexes
+    from utils.ingest import prepare_frame, to_records
+    from utils.locations import build_locations
+    from utils.rollups import rebuild_rollups
+
+    for name in ("listeria", "daily_rollups", "locations"):
+        db.drop_collection(name)
+    # mongomock checks unique indexes with a scan per insert, so it gets them after loading
+    if backend == "mongod":
+        ensure_indexes()
+
+    upload = synthetic_upload(n_rows)
+    start = time.perf_counter()
+    for offset in range(0, n_rows, INSERT_BATCH):
+        records = to_records(prepare_frame(upload.iloc[offset:offset + INSERT_BATCH], "bench"))
+        listeria_collection.insert_many(records, ordered=False)
+    ingest = time.perf_counter() - start
+    rebuild_rollups()
+    build_locations()
+    ensure_indexes()
+    return ingest
+
+
+def bench_trend(repeat):
+    from streamlit.testing.v1 import AppTest
+    from utils.cube import cube_from_rollups, cube_summaries
+    from utils.repository import invalidate
+    from utils.rollups import load_rollups
+    from utils.trend_charts import TREND_CHARTS
+
+    stages = {}
+    stages["load"], rollups = timed(load_rollups, repeat)
+    stages["aggregate"], summaries = timed(lambda: cube_summaries(cube_from_rollups(rollups)), repeat)
+    stages["figure"], _ = timed(
+        lambda: [spec["build"](summaries[spec["summary"]]).to_json() for spec in TREND_CHARTS.values()], repeat
+    )
+
+    # The page only builds the open tab's figure: time a rerun with warm caches
+    invalidate()
+    page = AppTest.from_file(os.path.join(ROOT, "pages", "2_Trend_Analysis.py"), default_timeout=600)
+    page.session_state["user"] = {"username": "bench", "role": "admin"}
+    page.run()
+    stages["rerun"], _ = timed(page.run, repeat)
+    if page.exception:
+        raise RuntimeError(page.exception[0].message)
+    return stages
+
+
+def bench_map(fresh_smoked, repeat):
+    from utils.db import find_frame
+    from utils.floor_map import FLOOR_MAPS, build_map_figure, build_map_points
+    from utils.history import HoverHistory
+    from utils.images import load_floor_plan
+    from utils.locations import load_locations, with_coordinates
+    from utils.positivity import DEFAULT_WINDOW, RollingPositivity
+    from utils.repository import MAP_COLUMNS
+
+    def load():
+        df = find_frame(MAP_COLUMNS, query={"fresh_smoked": fresh_smoked})
+        df["sample_day"] = df["sample_date"].dt.date
+        return df, load_locations()
+
+    stages = {}
+    stages["load"], (df, locations) = timed(load, repeat)
+    date = df["sample_day"].dropna().max()
+
+    def aggregate():
+        samples = with_coordinates(df[df["sample_day"] == date], locations)
+        history = HoverHistory(df).for_date(date, DEFAULT_WINDOW)
+        ratio = RollingPositivity(df).for_date(date, DEFAULT_WINDOW)
+        return samples, history, ratio
+
+    stages["aggregate"], (samples, history, ratio) = timed(aggregate, repeat)
+
+    config = FLOOR_MAPS[fresh_smoked]
+    image, (width, height) = load_floor_plan(os.path.join(ROOT, config["image_path"]))
+
+    def figure():
+        points = build_map_points(samples, ratio, history, DEFAULT_WINDOW)
+        # Serializing is what Streamlit does with the figure on every rerun
+        return build_map_figure(points, image, width, height, config["title"]).to_json()
+
+    stages["figure"], _ = timed(figure, repeat)
+    return stages
+
+
+def bench_export(repeat):
+    from utils.export import EXPORT_FORMATS, write_export
+
+    def export(fmt):
+        with write_export(fmt) as f:
+            return len(f.read())
+
+    return {f"export {fmt}": timed(lambda: export(fmt), repeat)[0] for fmt in EXPORT_FORMATS}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, threshold):
+    """Stages slower than threshold x the baseline, as printable lines."""
+    slower = []
+    for size, pages in report["results"].items():
+        for page, stages in pages.items():
+            for stage, seconds in stages.items():
+                before = baseline.get("results", {}).get(size, {}).get(page, {}).get(stage)
+                if before and seconds > before * threshold:
+                    slower.append(f"{size:>8} rows  {page:<22} {stage:<20} {before:8.3f}s -> {seconds:8.3f}s")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--backend", choices=["mongomock", "mongod"], default="mongomock")
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="bench_pages.json")
+    parser.add_argument("--compare", help="earlier report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    args = parser.parse_args()
+
+    use_backend(args.backend, args.uri)
+    from utils.repository import invalidate
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "backend": args.backend,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "results": {},
+    }
+    for size in args.sizes:
+        print(f"Loading {size:,} rows...", flush=True)
+        invalidate()
+        ingest = load_dataset(size, args.backend)
+        results = {
+            "admin": {"ingest": ingest, **bench_export(args.repeat)},
+            "trend analysis": bench_trend(args.repeat),
+            "fresh map": bench_map("Fresh", args.repeat),
+            "smoked map": bench_map("Smoking + Packing", args.repeat),
+        }
+        report["results"][str(size)] = results
+        for page, stages in results.items():
+            print(f"  {page:<16}" + "  ".join(f"{stage} {seconds:.3f}s" for stage, seconds in stages.items()))
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            slower = compare(report, json.load(f), args.threshold)
+        for line in slower:
+            print(f"SLOWER {line}")
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
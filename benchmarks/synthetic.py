@@ -0,0 +1,81 @@
+"""Synthetic listeria results shaped like an Admin upload (REQUIRED_COLUMNS).
+
+    python -m benchmarks.synthetic --rows 10000 --out synthetic.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from utils.aggregations import FRESH_AREAS, SMOKING_PACKING_AREAS
+from utils.ingest import SAMPLE_DATE_FORMAT
+
+N_POINTS = 300
+N_DAYS = 730
+POSITIVITY = 0.08
+MISSING_RESULT = 0.01
+ROWS_PER_REPORT = 50
+
+
+def swab_points(n_points=N_POINTS, seed=0):
+    """Fixed swab points: each has a location code, sub_area, department and floor-plan position."""
+    rng = np.random.default_rng(seed)
+    areas = np.array(FRESH_AREAS + SMOKING_PACKING_AREAS)
+    sub_area = areas[rng.integers(len(areas), size=n_points)]
+    return pd.DataFrame({
+        "points": [str(p) for p in range(n_points)],
+        "location_code": [f"LC{p:04d}" for p in range(n_points)],
+        "sub_area": sub_area,
+        "fresh_smoked": np.where(np.isin(sub_area, FRESH_AREAS), "Fresh", "Smoking + Packing"),
+        "x": rng.uniform(50, 1450, n_points).round(),
+        "y": rng.uniform(50, 1350, n_points).round(),
+    })
+
+
+def synthetic_upload(n_rows, n_points=N_POINTS, n_days=N_DAYS, seed=0, start="2024-01-01"):
+    """n_rows results as an upload frame (dates as dd-mm-YYYY strings), generated vectorized."""
+    rng = np.random.default_rng(seed)
+    points = swab_points(n_points, seed)
+    picked = points.iloc[rng.integers(n_points, size=n_rows)].reset_index(drop=True)
+
+    dates = pd.Timestamp(start) + pd.to_timedelta(np.sort(rng.integers(n_days, size=n_rows)), unit="D")
+    iso_week = dates.isocalendar().week.to_numpy()
+    detected = rng.random(n_rows) < POSITIVITY
+    missing = rng.random(n_rows) < MISSING_RESULT
+
+    df = pd.DataFrame({
+        "sample_code": [f"SYN{i:08d}" for i in range(n_rows)],
+        "sample_description": "Environmental swab",
+        "translated_description": "Environmental swab",
+        "test_code": "LM",
+        "test_result": np.where(missing, None, np.where(detected, "Detected", "Not Detected")),
+        "unit": "/swab",
+        "analytical_report_code": [f"AR{i // ROWS_PER_REPORT:06d}" for i in range(n_rows)],
+        "sample_date": dates.strftime(SAMPLE_DATE_FORMAT),
+        "location_code": picked["location_code"],
+        "fresh_smoked": picked["fresh_smoked"],
+        "sub_area": picked["sub_area"],
+        "before_during": np.where(rng.random(n_rows) < 0.5, "BP", "DP"),
+        "value": np.where(missing, np.nan, detected.astype(float)),
+        "week_num": iso_week,
+        "week": [f"Week-{week}" for week in iso_week],
+        "x": picked["x"],
+        "y": picked["y"],
+        "points": picked["points"],
+    })
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="synthetic.csv")
+    args = parser.parse_args()
+
+    synthetic_upload(args.rows, seed=args.seed).to_csv(args.out, index=False)
+    print(f"Wrote {args.rows:,} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
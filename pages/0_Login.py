@@ -1,5 +1,7 @@
 import streamlit as st
 from utils.auth import authenticate  # Make sure this path is correct
+from utils.indexes import ensure_indexes_once
+from utils.repository import ensure_rollups_once
 # from streamlit.source_util import get_pages
 
 # pages = get_pages("app.py")  # Replace with your actual main file name if different
@@ -8,6 +10,10 @@ from utils.auth import authenticate  # Make sure this path is correct
 # st.write(f"{page['page_name']}")
 st.title("🔐 Login")
 
+# 🗂️ Create any missing MongoDB indexes and build the rollups of existing history (once per server process)
+ensure_indexes_once()
+ensure_rollups_once()
+
 username = st.text_input("Username")
 password = st.text_input("Password", type="password")
 # st.write(f"{page['page_name']}")
@@ -2,10 +2,14 @@ import streamlit as st
 st.set_page_config(page_title="Trend Analysis", layout="wide")  # MUST be first Streamlit command
 
 import pandas as pd
-import plotly.express as px
-from utils.db import listeria_collection
-import plotly.graph_objects as go
-import numpy as np
+from utils.cube import filter_cube, resolution_for
+from utils.downsample import MAX_POINTS_PER_TRACE
+from utils.profiler import lap, render_profiler_panel, section, start_page
+from utils.repository import data_version, load_count_cube, load_date_bounds, rollups_available
+from utils.trend_charts import TREND_CHARTS, load_trend_figure
+
+# Trailing window shown until the user picks another range
+DEFAULT_WINDOW_WEEKS = 12
 
 # 🔐 Authentication check
 if "user" not in st.session_state:
@@ -19,696 +23,78 @@ if st.sidebar.button("Logout"):
     st.success("🔓 Logged out successfully.")
     st.stop()
 
-# Load Data
-data = pd.DataFrame(list(listeria_collection.find()))
-#####################################################
-# Ensure sample_date is datetime
-data['sample_date'] = pd.to_datetime(data['sample_date'])
-
-# Group by day
-daily_summary = data.groupby('sample_date')['test_result'].agg(
-    total_samples='count',
-    detected_tests=lambda x: (x == 'Detected').sum()
-).reset_index()
-
-# Create Plotly Figure
-fig = go.Figure()
-
-# Total Samples bar
-fig.add_trace(go.Bar(
-    x=daily_summary['sample_date'],
-    y=daily_summary['total_samples'],
-    name='Total Samples',
-    marker_color='#a06cd5'  # Purple
-))
-
-# Detected Samples bar
-fig.add_trace(go.Bar(
-    x=daily_summary['sample_date'],
-    y=daily_summary['detected_tests'],
-    name='Detected Samples',
-    marker_color='#C00000'  # Red
-))
-
-# Layout for grouped bars
-fig.update_layout(
-    title='Day-wise Total vs Detected Samples',
-    xaxis=dict(
-        title='Sample Date',
-        type='date',
-        tickformat='%d-%b',
-        tickangle=-90,
-        dtick='D1',
-        rangeslider=dict(
-            visible=True,
-            thickness=0.01
-        )
-    ),
-    yaxis=dict(title='Number of Samples'),
-    barmode='group',  # Grouped side-by-side bars
-    bargap=0.2,
-    legend=dict(
-        orientation='h',
-        yanchor='bottom',
-        y=1.05,
-        xanchor='center',
-        x=0.5
-    ),
-    height=500,
-    margin=dict(l=60, r=40, t=60, b=140)
-)
-
-# Show in Streamlit
-st.plotly_chart(fig, use_container_width=True, key='daily_total_vs_detected')
-
-
-
-#####################################################
-
-
-# Compute detection stats by week (without categorizing by before_during)
-grouped = data.groupby(['week'])
-
-summary = grouped['test_result'].agg(
-    total_tests='count',
-    detected_tests=lambda x: (x == 'Detected').sum()
-).reset_index()
-
-summary['detection_rate_percent'] = (
-    (summary['detected_tests'] / summary['total_tests']) * 100
-).round(1)
-
-# Extract numeric part of week for proper sorting (e.g., "Week-12" → 12)
-summary['week_num'] = summary['week'].str.extract(r'Week-(\d+)').astype(int)
-
-# Sort by the extracted week number
-summary = summary.sort_values(by='week_num')
-
-# Fit a linear trend line to detection_rate_percent
-x_vals = summary['week_num']
-y_vals = summary['detection_rate_percent']
-# slope, intercept = np.polyfit(x_vals, y_vals, 1)
-# trend_y = slope * x_vals + intercept
-
-# Fit a 2nd-degree polynomial trend line
-coeffs = np.polyfit(x_vals, y_vals, deg=2)
-poly = np.poly1d(coeffs)
-trend_y = poly(x_vals)
-
-
-# Create the combo chart
-# st.subheader("Detection Summary")
-
-fig = go.Figure()
-
-
-# Bar for total tests
-fig.add_trace(go.Bar(
-    x=summary['week'],
-    y=summary['total_tests'],
-    name='Total Tests',
-    marker_color='#dac3e8',
-    yaxis='y1'
-))
-
-# Line for detection rate %
-fig.add_trace(go.Scatter(
-    x=summary['week'],
-    y=summary['detection_rate_percent'],
-    name='Detection Rate (%)',
-    mode='lines+markers',
-    marker=dict(color='#C00000'),
-    line=dict(color='#C00000'),
-    yaxis='y2'
-))
-
-
-fig.update_layout(
-    title="Detection Summary by Week",
-    yaxis=dict(
-        title="Total/Detected Tests",
-        side="left",
-        range=[0, 500]
-    ),
-    yaxis2=dict(
-        title="Detection Rate (%)",
-        overlaying="y",
-        side="right",
-        range=[0, 100]
-    ),
-    legend=dict(x=0.2, xanchor="center", orientation="h"),
-    height=500,
-    bargap=0.3,        # Gap between weeks (x categories)
-    bargroupgap=0      # No gap between bars in the same group (Total vs Detected)
-)
-
-st.plotly_chart(fig, use_container_width=True)
-
-################################################
-# Ensure sample_date is datetime
-data['sample_date'] = pd.to_datetime(data['sample_date'])
-
-# Group by actual sample_date (daily)
-grouped = data.groupby('sample_date')
-
-summary = grouped['test_result'].agg(
-    total_tests='count',
-    detected_tests=lambda x: (x == 'Detected').sum()
-).reset_index()
-
-summary['detection_rate_percent'] = (
-    (summary['detected_tests'] / summary['total_tests']) * 100
-).round(1)
-
-# Sort by date for plotting
-summary = summary.sort_values(by='sample_date')
-
-# Fit a 2nd-degree polynomial trend line
-x_vals = summary['sample_date'].map(pd.Timestamp.toordinal)
-y_vals = summary['detection_rate_percent']
-coeffs = np.polyfit(x_vals, y_vals, deg=2)
-poly = np.poly1d(coeffs)
-trend_y = poly(x_vals)
-
-# Plot combo chart
-# st.subheader("Detection Summary by Date")
-
-fig = go.Figure()
-
-# Total tests (bar)
-fig.add_trace(go.Bar(
-    x=summary['sample_date'],
-    y=summary['total_tests'],
-    name='Total Tests',
-    marker_color='#a06cd5',
-    yaxis='y1',
-    opacity=0.6
-))
-
-# Detection rate (line)
-fig.add_trace(go.Scatter(
-    x=summary['sample_date'],
-    y=summary['detection_rate_percent'],
-    name='Detection Rate (%)',
-    mode='lines+markers',
-    marker=dict(color='#C00000'),
-    line=dict(color='#C00000'),
-    yaxis='y2'
-))
-
-# Layout
-fig.update_layout(
-    title="Detection Summary by Date",
-
-    xaxis=dict(
-    title='Sample Date',
-    type='date',
-    tickangle=-90,
-    tickformat='%d-%b',
-    dtick='D1',
-    rangeslider=dict(
-        visible=True,
-        thickness=0.02,
-        bgcolor='lightgrey',
-        bordercolor='grey',
-        borderwidth=1
-    ),
-    showgrid=True
-    ),
-    yaxis=dict(title='Total/Detected Tests', side='left'),
-    yaxis2=dict(title='Detection Rate (%)', overlaying='y', side='right', range=[0, 150]),
-    legend=dict(
-        orientation='h',
-        yanchor='bottom',
-        y=1.1,
-        xanchor='center',
-        x=0.5
-    ),
-    margin=dict(l=60, r=40, t=80, b=180),
-    height=600,
-    bargap=0.2,
-    bargroupgap=0,
-    barmode='overlay'  # Prevent bar grouping
-)
-
-st.plotly_chart(fig, use_container_width=True, key='detection_summary_trend')
-
-###############################################
-
-# # 2 Group data #
-# area_summary = data.groupby('sub_area')['test_result'].agg(
-#     total_samples='count',
-#     detected_tests=lambda x: (x == 'Detected').sum()
-# ).reset_index()
-
-# # Calculate detection rate
-# area_summary['detection_rate_percent'] = (
-#     (area_summary['detected_tests'] / area_summary['total_samples']) * 100
-# ).round(1)
-
-# # Sort areas alphabetically
-# area_summary = area_summary.sort_values(by='sub_area')
-
-# # Create figure
-# fig = go.Figure()
-
-# # Bar for # Samples
-# fig.add_trace(go.Bar(
-#     x=area_summary['sub_area'],
-#     y=area_summary['total_samples'],
-#     name='Total Samples',
-#     marker_color='#a06cd5',
-#     yaxis='y1'
-# ))
-
-# # Line for % Detection Rate
-# fig.add_trace(go.Scatter(
-#     x=area_summary['sub_area'],
-#     y=area_summary['detection_rate_percent'],
-#     name='Detection Rate (%)',
-#     mode='lines+markers+text',
-#     text=area_summary['detection_rate_percent'],
-#     textposition='top center',
-#     yaxis='y2',
-#     line=dict(color='crimson', width=3)
-# ))
-
-# # Layout
-# fig.update_layout(
-#     title='# Samples vs % Detection Rate by Area',
-#     xaxis=dict(title='Area', categoryorder='array', categoryarray=area_summary['sub_area']),
-#     yaxis=dict(title='Total Samples', side='left', showgrid=False),
-#     yaxis2=dict(title='Detection Rate (%)', overlaying='y', side='right', range=[0, 100]),
-#     legend=dict(orientation='h', yanchor='bottom', y=-0.3, xanchor='center', x=0.5),
-#     height=500
-# )
-
-
-import plotly.graph_objects as go
-from collections import OrderedDict
-
-# Step 1: Group data
-area_summary = data.groupby('sub_area')['test_result'].agg(
-    total_samples='count',
-    detected_tests=lambda x: (x == 'Detected').sum()
-).reset_index()
-
-# Step 2: Calculate detection rate
-area_summary['detection_rate_percent'] = (
-    (area_summary['detected_tests'] / area_summary['total_samples']) * 100
-).round(1)
-
-# Step 3: Define custom x-axis order
-custom_order = [
-    # Fresh
-    'PRODUCTION', 'DEBONING', 'DESKINNING', 'INJECTOR',
-    'WASHER', 
-    # Smoking + Packing
-    'ENTRANCE', 'LKPW1', 'LKPW2', 'CFS',
-    'OTHER'
-    # # Unmapped
-    # 'Unmapped'
-]
-
-# Remove duplicates while keeping order
-custom_order = list(OrderedDict.fromkeys(custom_order))
-
-# Step 4: Set sub_area as categorical using custom order
-area_summary['sub_area'] = pd.Categorical(
-    area_summary['sub_area'], 
-    categories=custom_order, 
-    ordered=True
-)
-
-# Step 5: Sort by the ordered category
-area_summary = area_summary.sort_values('sub_area')
-
-# Step 6: Create Plotly figure
-fig = go.Figure()
-
-fig.add_trace(go.Bar(
-    x=area_summary['sub_area'],
-    y=area_summary['total_samples'],
-    name='Total Samples',
-    marker_color='#d2b7e5',
-    yaxis='y1'
-))
-
-fig.add_trace(go.Scatter(
-    x=area_summary['sub_area'],
-    y=area_summary['detection_rate_percent'],
-    name='Detection Rate (%)',
-    mode='lines+markers+text',
-    text=area_summary['detection_rate_percent'],
-    textposition='top center',
-    yaxis='y2',
-    line=dict(color='crimson', width=3)
-))
 
-fig.update_layout(
-    title='# Samples vs % Detection Rate by Area (Process Flow)',
-    xaxis=dict(
-        title='Sub Area',
-        categoryorder='array',
-        categoryarray=custom_order
-    ),
-    yaxis=dict(title='Total Samples', side='left', showgrid=False),
-    yaxis2=dict(title='Detection Rate (%)', overlaying='y', side='right', range=[0, 100]),
-    legend=dict(orientation='h', yanchor='bottom', y=-0.3, xanchor='center', x=0.5),
-    height=500
-)
-
-# Step 7: Display in Streamlit
-st.plotly_chart(fig, use_container_width=True, key="samples_vs_detection_rate")
-
-
-# # Display in Streamlit with unique key
-# st.plotly_chart(fig, use_container_width=True, key="samples_vs_detection_rate")
-
-# 3 Filter for 'Before Production'
-filtered = data[data['before_during'] == 'BP']
-
-# Ensure date column is datetime
-filtered['sample_date'] = pd.to_datetime(filtered['sample_date'])
-
-# Group by Date
-date_summary = filtered.groupby('sample_date')['test_result'].agg(
-    total_samples='count',
-    detected_tests=lambda x: (x == 'Detected').sum()
-).reset_index()
-
-# Calculate detection rate
-date_summary['detection_rate_percent'] = (
-    (date_summary['detected_tests'] / date_summary['total_samples']) * 100
-).round(1)
-
-# Sort by date
-date_summary = date_summary.sort_values(by='sample_date')
-
-# Create chart
-fig = go.Figure()
-
-# Bar for total samples
-fig.add_trace(go.Bar(
-    x=date_summary['sample_date'],
-    y=date_summary['total_samples'],
-    name='Total Samples',
-    marker_color='#a06cd5',
-    yaxis='y1'
-))
-
-# Line for detection rate
-fig.add_trace(go.Scatter(
-    x=date_summary['sample_date'],
-    y=date_summary['detection_rate_percent'],
-    name='Detection Rate (%)',
-    mode='lines+markers',
-    line=dict(color='crimson', width=2),
-    yaxis='y2'
-))
-
-# Layout with top legend and all date ticks
-fig.update_layout(
-    title='# Samples vs Detection Rate Before Production',
-    xaxis=dict(
-        title='Date',
-        type='date',
-        tickangle=-90,
-        tickformat='%d-%b',  # e.g., 12-May
-        dtick='D1',          # Force daily tick labels
-        rangeslider=dict(
-            visible=True,
-            thickness=0.02,
-            bgcolor='lightgrey',
-            bordercolor='grey',
-            borderwidth=1
-        ),
-        showgrid=True
-    ),
-    yaxis=dict(title='Total Samples', side='left'),
-    yaxis2=dict(title='Detection Rate (%)', overlaying='y', side='right', range=[0, 100]),
-    legend=dict(
-        orientation='h',
-        yanchor='bottom',
-        y=1.1,  # Above chart
-        xanchor='center',
-        x=0.5
-    ),
-    height=500
-)
-
-# Streamlit chart
-st.plotly_chart(fig, use_container_width=True, key='before_production_trend')
-
-
-
-
-
-
-
-
-
-# 4 Filter for 'During Production'
-filtered = data[data['before_during'] == 'DP']
-
-# Ensure date column is datetime
-filtered['sample_date'] = pd.to_datetime(filtered['sample_date'])
-
-# Group by Date
-date_summary = filtered.groupby('sample_date')['test_result'].agg(
-    total_samples='count',
-    detected_tests=lambda x: (x == 'Detected').sum()
-).reset_index()
-
-# Calculate detection rate
-date_summary['detection_rate_percent'] = (
-    (date_summary['detected_tests'] / date_summary['total_samples']) * 100
-).round(1)
-
-# Sort by date
-date_summary = date_summary.sort_values(by='sample_date')
-
-# Create chart
-fig = go.Figure()
-
-# Bar for total samples
-fig.add_trace(go.Bar(
-    x=date_summary['sample_date'],
-    y=date_summary['total_samples'],
-    name='Total Samples',
-    marker_color='#a06cd5',
-    yaxis='y1'
-))
-
-# Line for detection rate
-fig.add_trace(go.Scatter(
-    x=date_summary['sample_date'],
-    y=date_summary['detection_rate_percent'],
-    name='Detection Rate (%)',
-    mode='lines+markers',
-    line=dict(color='crimson', width=2),
-    yaxis='y2'
-))
-
-# Layout with top legend and all date ticks
-fig.update_layout(
-    title='# Samples vs Detection Rate During Production',
-    xaxis=dict(
-        title='Date',
-        type='date',
-        tickangle=-90,
-        tickformat='%d-%b',  # e.g., 12-May
-        dtick='D1',          # Force daily tick labels
-        rangeslider=dict(
-            visible=True,
-            thickness=0.02,
-            bgcolor='lightgrey',
-            bordercolor='grey',
-            borderwidth=1
-        ),
-        showgrid=True
-    ),
-    yaxis=dict(title='Total Samples', side='left'),
-    yaxis2=dict(title='Detection Rate (%)', overlaying='y', side='right', range=[0, 100]),
-    legend=dict(
-        orientation='h',
-        yanchor='bottom',
-        y=1.1,  # Above chart
-        xanchor='center',
-        x=0.5
-    ),
-    height=500
-)
-
-# Streamlit chart
-st.plotly_chart(fig, use_container_width=True, key='during_production_trend')
-
-###############################################################
-# --- Map sub_area to departments ---
-fresh_areas = ['PRODUCTION', 'DEBONING', 'DESKINNING', 'INJECTOR', 'WASHER']
-smoking_packing_areas = ['ENTRANCE', 'LKPW1', 'LKPW2', 'CFS', 'OTHER']
-
-# Assign department based on sub_area
-def assign_department(area):
-    if area in fresh_areas:
-        return 'Fresh'
-    elif area in smoking_packing_areas:
-        return 'Smoking + Packing'
+def render_trend_analysis():
+    """Everything below the login check; returns early when there is nothing to chart."""
+    # Load Data
+    # Every chart is a slice of one small count cube, read from the daily_rollups collection
+    from_rollups = st.sidebar.toggle("Use daily rollups", value=True)
+    if from_rollups and not rollups_available():
+        st.sidebar.caption("Daily rollups are not built yet; reading the samples until an admin rebuilds them.")
+        from_rollups = False
+    first_date, last_date = load_date_bounds(from_rollups)
+    if last_date is None:
+        st.warning("No dated samples found in the database.")
+        return
+
+    # 📅 Date window, pushed into the Mongo query; long spans are drawn weekly or monthly
+    st.sidebar.header("Filters")
+    all_time = st.sidebar.toggle("All time", value=False, help="The whole history, at weekly or monthly resolution.")
+    if all_time:
+        start_date, end_date = first_date.date(), last_date.date()
     else:
-        return 'Unmapped'
-
-data['department'] = data['sub_area'].apply(assign_department)
-
-# --- Filter for valid departments only ---
-data = data[data['department'].isin(['Fresh', 'Smoking + Packing'])]
-
-# --- Ensure sample_date is datetime ---
-data['sample_date'] = pd.to_datetime(data['sample_date'])
-
-# --- Group by sample_date and department ---
-grouped = data.groupby(['sample_date', 'department'])['test_result'].agg(
-    total_samples='count',
-    detected_tests=lambda x: (x == 'Detected').sum()
-).reset_index()
-
-# --- Calculate detection rate ---
-grouped['detection_rate_percent'] = (
-    (grouped['detected_tests'] / grouped['total_samples']) * 100
-).round(1)
-
-# --- Pivot for Plotly line chart ---
-pivot = grouped.pivot(index='sample_date', columns='department', values='detection_rate_percent').fillna(0)
-
-# --- Plotting ---
-fig = go.Figure()
-
-colors = {
-    'Fresh': '#70ad47',             # Green
-    'Smoking + Packing': '#4472c4'  # Blue
-}
-
-for dept in pivot.columns:
-    fig.add_trace(go.Scatter(
-        x=pivot.index,
-        y=pivot[dept],
-        name=f'{dept} Detection Rate (%)',
-        mode='lines+markers',
-        line=dict(color=colors[dept], width=2),
-        marker=dict(size=6)
-    ))
-
-# --- Layout ---
-fig.update_layout(
-    title="Detection Rate Trend by Department",
-    xaxis=dict(
-        title='Sample Date',
-        type='date',
-        tickangle=-90,
-        tickformat='%d-%b',
-        dtick='D1',
-        # rangeslider=dict(visible=True),
-        #  thickness=0.01  # 1% of plot height
-        # showgrid=True
-        rangeslider=dict(
-        visible=True,
-        thickness=0.02,
-        bgcolor='lightgrey',
-        bordercolor='grey',
-        borderwidth=1
-    ),
-    showgrid=True
-    ),
-    yaxis=dict(title='Detection Rate (%)', range=[0, 100]),
-    legend=dict(
-        orientation='h',
-        yanchor='bottom',
-        y=1.1,
-        xanchor='center',
-        x=0.5
-    ),
-    height=500,
-    margin=dict(l=60, r=40, t=80, b=120)
-)
-
-# --- Display in Streamlit ---
-st.plotly_chart(fig, use_container_width=True, key='department_trend')
-
-
-
-
-
-################################################################
-# # 5 Filter for 'Unmapped Samples'
-# filtered = data[data['before_during'] == 'Unmapped']
-
-# # Ensure date column is datetime
-# filtered['sample_date'] = pd.to_datetime(filtered['sample_date'])
-
-# # Group by Date
-# date_summary = filtered.groupby('sample_date')['test_result'].agg(
-#     total_samples='count',
-#     detected_tests=lambda x: (x == 'Detected').sum()
-# ).reset_index()
-
-# # Calculate detection rate
-# date_summary['detection_rate_percent'] = (
-#     (date_summary['detected_tests'] / date_summary['total_samples']) * 100
-# ).round(1)
-
-# # Sort by date
-# date_summary = date_summary.sort_values(by='sample_date')
-
-# # Create chart
-# fig = go.Figure()
-
-# # Bar for total samples
-# fig.add_trace(go.Bar(
-#     x=date_summary['sample_date'],
-#     y=date_summary['total_samples'],
-#     name='Total Samples',
-#     marker_color='#a06cd5',
-#     yaxis='y1'
-# ))
-
-# # Line for detection rate
-# fig.add_trace(go.Scatter(
-#     x=date_summary['sample_date'],
-#     y=date_summary['detection_rate_percent'],
-#     name='Detection Rate (%)',
-#     mode='lines+markers',
-#     line=dict(color='crimson', width=2),
-#     yaxis='y2'
-# ))
-
-# # Layout with top legend and all date ticks
-# fig.update_layout(
-#     title='# Unmapped Samples vs Detection Rate',
-#     xaxis=dict(
-#         title='Date',
-#         type='date',
-#         tickangle=-90,
-#         tickformat='%d-%b',  # e.g., 12-May
-#         dtick='D1',          # Force daily tick labels
-#         rangeslider=dict(
-#             visible=True,
-#             thickness=0.02,
-#             bgcolor='lightgrey',
-#             bordercolor='grey',
-#             borderwidth=1
-#         ),
-#         showgrid=True
-#     ),
-#     yaxis=dict(title='Total Samples', side='left'),
-#     yaxis2=dict(title='Detection Rate (%)', overlaying='y', side='right', range=[0, 100]),
-#     legend=dict(
-#         orientation='h',
-#         yanchor='bottom',
-#         y=1.1,  # Above chart
-#         xanchor='center',
-#         x=0.5
-#     ),
-#     height=500
-# )
-
-# # Streamlit chart
-# st.plotly_chart(fig, use_container_width=True, key='unmapped_trend')
+        default_start = max(first_date, last_date - pd.Timedelta(weeks=DEFAULT_WINDOW_WEEKS) + pd.Timedelta(days=1))
+        date_range = st.sidebar.date_input(
+            "Date Range", [default_start.date(), last_date.date()],
+            min_value=first_date.date(), max_value=last_date.date()
+        )
+        # date_input returns a single date while the user is still picking the range end
+        start_date = date_range[0] if len(date_range) > 0 else first_date.date()
+        end_date = date_range[1] if len(date_range) > 1 else start_date
+    daily_detail = st.sidebar.toggle(
+        "Keep daily detail", value=False,
+        help=f"Daily points for any span; long series are downsampled to {MAX_POINTS_PER_TRACE} points."
+    )
+    webgl = st.sidebar.toggle("WebGL rendering", value=False, help="Faster in the browser for long series.")
+    resolution = "day" if daily_detail else resolution_for(start_date, end_date)
+    window = dict(start=start_date, end=end_date, resolution=resolution)
+    if resolution != "day":
+        st.sidebar.caption(f"Showing {resolution}ly totals for this span.")
+    cube = load_count_cube(from_rollups, **window)
+    lap("Load count cube", frame=cube)
+
+    # 🔎 Filters (applied to the cube only, no new query)
+    sub_areas = st.sidebar.multiselect("Sub Area", sorted(cube['sub_area'].dropna().unique()))
+    before_during = st.sidebar.multiselect("Before/During Production", ['BP', 'DP'])
+    departments = st.sidebar.multiselect("Department", sorted(cube['department'].dropna().unique()))
+
+    filters = dict(
+        sub_areas=sub_areas or None,
+        before_during=before_during or None,
+        departments=departments or None
+    )
+    lap("Filters")
+    if filter_cube(cube, **filters).empty:
+        st.warning("No samples match the selected filters.")
+        return
+
+    # 📊 One tab per chart; only the open tab is computed, memoized per window, filters and data version
+    tabs = st.tabs(list(TREND_CHARTS), key="trend_chart", on_change="rerun")
+    for chart, tab in zip(TREND_CHARTS, tabs):
+        if not tab.open:
+            continue
+        with tab:
+            with section(f"{chart}: build") as built:
+                fig = load_trend_figure(chart, from_rollups, window, filters, data_version(), webgl)
+            built.figure(fig)
+            with section(f"{chart}: render"):
+                st.plotly_chart(fig, width="stretch", key=f"trend_{chart}")
+
+
+# ⏱️ Opt-in section timings for admins (sidebar "Profiler" panel)
+start_page("Trend Analysis")
+try:
+    render_trend_analysis()
+finally:
+    # Also when the page returns early, so the Profiler toggle stays reachable
+    render_profiler_panel()
@@ -1,6 +1,19 @@
 import streamlit as st
 import pandas as pd
-from utils.db import listeria_collection
+from utils.aggregations import DEPARTMENTS
+from utils.export import EXPORT_FORMATS, export_query, write_export
+from utils.indexes import ensure_indexes, index_status
+from utils.ingest import (
+    DEFAULT_BATCH_SIZE, DEFAULT_CHUNK_ROWS, NATURAL_KEY, deduplicate_samples, ingest_csv, ingest_records,
+    missing_columns, prepare_frame, to_records
+)
+from utils.migrations import normalize_documents
+from utils.coordinate_editor import render_coordinate_editor
+from utils.locations import (
+    build_locations, load_locations, read_coordinates_csv, set_coordinates, set_coordinates_many
+)
+from utils.repository import invalidate, invalidate_locations
+from utils.rollups import rebuild_rollups
 
 # 🔐 Check if user is logged in
 if "user" not in st.session_state:
@@ -23,85 +36,260 @@ if st.sidebar.button("Logout"):
 st.title("📁 Admin: Upload Listeria Results Data")
 
 uploaded_file = st.file_uploader("Upload Results File", type=["csv"])
-if uploaded_file:
+streaming = st.toggle("Streaming mode (chunked upload for large files)", value=False)
+replace_existing = st.radio(
+    "Rows already in the database",
+    ["Replace them (re-upload / corrected report)", "Skip rows already stored"],
+    help=f"Rows are matched on {', '.join(NATURAL_KEY)}; each key is stored once, so skipped rows are listed in the report."
+).startswith("Replace")
+username = st.session_state.user.get("username", "admin")
+
+if uploaded_file and streaming:
     try:
-        df = pd.read_csv(uploaded_file, encoding="utf-8", encoding_errors="replace")
+        preview = pd.read_csv(uploaded_file, encoding="utf-8", encoding_errors="replace", nrows=5)
+        uploaded_file.seek(0)
     except Exception as e:
         st.error(f"Error reading CSV file: {e}")
         st.stop()
 
-    st.write(df.head())  # Preview data
+    st.write(preview)  # Preview data
+
+    missing = missing_columns(preview.columns)
+    if missing:
+        st.error(f"Missing required columns: {', '.join(sorted(missing))}")
+        st.stop()
+
+    col1, col2 = st.columns(2)
+    chunk_rows = col1.number_input("Rows per chunk", min_value=100, value=DEFAULT_CHUNK_ROWS, step=1000)
+    batch_size = col2.number_input("Rows per insert batch", min_value=100, value=DEFAULT_BATCH_SIZE, step=100)
 
-    # ✅ Required columns
-    required_columns = {
-        "sample_code", "sample_description", "translated_description", "test_code", "test_result", "unit",
-        "analytical_report_code", "sample_date", "location_code", "fresh_smoked", "sub_area",
-        "before_during", "value", "week_num", "week", "x", "y", "points"
-    }
+    # 📤 Stream to MongoDB
+    if st.button("Stream to MongoDB"):
+        progress = st.progress(0.0, text="Starting upload...")
 
-    if not required_columns.issubset(df.columns):
-        st.error(f"Missing required columns: {', '.join(required_columns - set(df.columns))}")
+        def show_progress(report, fraction):
+            rate = report["rows_read"] / report["seconds"] if report["seconds"] else 0
+            progress.progress(
+                fraction if fraction is not None else 0.0,
+                text=f"{report['rows_read']:,} rows read · {report['inserted']:,} inserted · {rate:,.0f} rows/s"
+            )
+
+        report = None
+        try:
+            report = ingest_csv(
+                uploaded_file, username, int(chunk_rows), int(batch_size), show_progress, upsert=replace_existing
+            )
+        except Exception as e:
+            st.error(f"❌ Upload stopped: {e}")
+        finally:
+            # Batches written before a failure count too. Replaced rows make the
+            # dashboards reload in full; pure appends load only the new rows
+            invalidate(modified=report is None or report["replaced"] > 0)
+
+        if report is not None:
+            progress.progress(1.0, text=f"Done in {report['seconds']:.1f}s")
+            if report["inserted"] or report["replaced"]:
+                st.success(
+                    f"✅ Inserted {report['inserted']} and replaced {report['replaced']} records in the database!"
+                )
+            if report["repeated"]:
+                st.warning(f"⚠️ {report['repeated']} row(s) repeated a natural key within a batch; the last one was kept.")
+            if report["errors"]:
+                st.warning(f"⚠️ {report['failed']} row(s) were not inserted.")
+                st.dataframe(report["errors"], width="stretch")
+
+elif uploaded_file:
+    try:
+        df = pd.read_csv(uploaded_file, encoding="utf-8", encoding_errors="replace")
+    except Exception as e:
+        st.error(f"Error reading CSV file: {e}")
         st.stop()
 
-    # 🕓 Date parsing
-    df["sample_date"] = pd.to_datetime(df["sample_date"], format="%d-%m-%Y", errors="coerce")
-    df["sample_date"] = df["sample_date"].where(df["sample_date"].notna(), None)
+    st.write(df.head())  # Preview data
 
-    # 🧑 Add uploader info
-    username = st.session_state.user.get("username", "admin")
-    df["uploaded_by"] = username
+    # ✅ Required columns, date parsing and uploader info
+    try:
+        df = prepare_frame(df, username)
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
 
     # 📤 Upload to MongoDB
     if st.button("Upload to MongoDB"):
+        # Written in DEFAULT_BATCH_SIZE batches, so a large file is neither one
+        # huge upsert filter nor a single round trip
+        report = None
         try:
-            data_list = df.to_dict(orient="records")
-            result = listeria_collection.insert_many(data_list)
-            st.success(f"✅ Inserted {len(result.inserted_ids)} records into the database!")
+            report = ingest_records(to_records(df), upsert=replace_existing)
         except Exception as e:
             st.error(f"❌ Database Error: {e}")
+        finally:
+            invalidate(modified=report is None or report["replaced"] > 0)
 
-# 📥 Download existing MongoDB collection as CSV
+        if report is not None:
+            st.success(
+                f"✅ Inserted {report['inserted']} and replaced {report['replaced']} records in the database!"
+            )
+            if report["repeated"]:
+                st.warning(f"⚠️ {report['repeated']} row(s) repeated a natural key in the file; the last one was kept.")
+            if report["errors"]:
+                st.warning(f"⚠️ {report['failed']} row(s) were not inserted.")
+                st.dataframe(report["errors"], width="stretch")
+
+# 📥 Download existing MongoDB collection; the file is only built when the button is clicked
 st.subheader("📥 Download MongoDB Data")
 
-try:
-    data = list(listeria_collection.find({}))
-    if not data:
-        st.warning("⚠️ No data found in the collection.")
-    else:
-        df_export = pd.DataFrame(data)
-        if "_id" in df_export.columns:
-            df_export.drop(columns=["_id"], inplace=True)
-        csv = df_export.to_csv(index=False).encode("utf-8")
-        st.download_button(
-            label="📄 Download Listeria Collection as CSV",
-            data=csv,
-            file_name="listeria_data.csv",
-            mime="text/csv"
-        )
-except Exception as e:
-    st.error(f"❌ Failed to export data: {e}")
+col1, col2, col3 = st.columns(3)
+export_format = col1.selectbox("Format", list(EXPORT_FORMATS))
+export_range = col2.date_input("Date Range (optional)", value=[])
+export_departments = col3.multiselect("Department (optional)", DEPARTMENTS)
+
+export_start, export_end = (list(export_range) + [None, None])[:2]
+if export_start is not None and export_end is None:
+    export_end = export_start
+export_filter = export_query(export_start, export_end, export_departments)
+
+
+def build_export():
+    with write_export(export_format, export_filter) as f:
+        return f.read()
+
+
+st.download_button(
+    label=f"📄 Download Listeria Collection as {export_format}",
+    data=build_export,
+    file_name=f"listeria_data.{EXPORT_FORMATS[export_format]['extension']}",
+    mime=EXPORT_FORMATS[export_format]["mime"]
+)
 
 # 🛠️ Admin Tool to Correct X, Y Coordinates
 st.subheader("🛠️ Update X/Y Coordinates for a Location Code")
 
-try:
-    location_codes = listeria_collection.distinct("location_code")
-    if location_codes:
-        selected_code = st.selectbox("Select Location Code", sorted([str(code) for code in location_codes if code]))
-
-        with st.form("xy_update_form"):
-            new_x = st.number_input("New X Coordinate", min_value=0.0, step=1.0)
-            new_y = st.number_input("New Y Coordinate", min_value=0.0, step=1.0)
-            update_btn = st.form_submit_button("Update Coordinates")
-
-            if update_btn:
-                result = listeria_collection.update_many(
-                    {"location_code": selected_code},
-                    {"$set": {"x": new_x, "y": new_y}}
+coordinate_mode = st.radio(
+    "Mode", ["One location", "Bulk CSV (location_code,x,y)", "Click on floor plan"], horizontal=True
+)
+
+if coordinate_mode == "One location":
+    try:
+        locations = load_locations()
+        if not locations.empty:
+            selected_code = st.selectbox("Select Location Code", sorted(locations.index.dropna(), key=str))
+            current = locations.loc[selected_code]
+
+            with st.form("xy_update_form"):
+                new_x = st.number_input(
+                    "New X Coordinate", min_value=0.0, step=1.0,
+                    value=float(current["x"]) if pd.notna(current["x"]) else 0.0
+                )
+                new_y = st.number_input(
+                    "New Y Coordinate", min_value=0.0, step=1.0,
+                    value=float(current["y"]) if pd.notna(current["y"]) else 0.0
                 )
-                st.success(f"✅ Updated {result.modified_count} record(s) for location_code = '{selected_code}'.")
+                update_btn = st.form_submit_button("Update Coordinates")
+
+                if update_btn:
+                    # One registry document; the maps join it onto every sample of this location
+                    set_coordinates(selected_code, new_x, new_y)
+                    invalidate_locations()
+                    st.success(f"✅ Updated coordinates for location_code = '{selected_code}'.")
+        else:
+            st.info("No locations registered yet; build the registry below.")
+    except Exception as e:
+        st.error(f"Error loading location codes: {e}")
+
+elif coordinate_mode.startswith("Bulk"):
+    coordinates_file = st.file_uploader("Upload Coordinates File", type=["csv"], key="coordinates_file")
+    if coordinates_file:
+        try:
+            coordinates, rejected = read_coordinates_csv(coordinates_file)
+        except Exception as e:
+            st.error(f"Error reading coordinates file: {e}")
+        else:
+            st.write(coordinates.head())  # Preview data
+            if not rejected.empty:
+                st.warning(f"⚠️ {len(rejected)} row(s) without a code or with invalid coordinates will be skipped.")
+                st.dataframe(rejected, width="stretch")
+
+            if st.button(f"Apply {len(coordinates)} Coordinates"):
+                try:
+                    updated, added = set_coordinates_many(coordinates)
+                    invalidate_locations()
+                    st.success(f"✅ Updated {updated} and added {added} location(s) in one bulk write.")
+                except Exception as e:
+                    st.error(f"❌ Database Error: {e}")
+
+else:
+    try:
+        render_coordinate_editor()
+    except Exception as e:
+        st.error(f"Error loading the coordinate editor: {e}")
+
+# 📍 Build the locations registry from the coordinates stored on samples
+st.subheader("📍 Build Location Registry")
+st.caption(
+    "One-off migration: copies the latest x/y, sub_area and department of every location_code into the "
+    "locations collection. Overwrites coordinates edited since."
+)
+if st.button("Build Location Registry"):
+    try:
+        with st.spinner("Building locations registry..."):
+            count = build_locations()
+        invalidate_locations()
+        st.success(f"✅ Registered {count} locations.")
+    except Exception as e:
+        st.error(f"❌ Failed to build the registry: {e}")
+
+# 🔁 Rebuild the daily_rollups collection from the full sample history
+st.subheader("🔁 Rebuild Daily Rollups")
+st.caption("Only needed after a backfill or a manual edit of the listeria collection; uploads keep the rollups up to date.")
+if st.button("Rebuild Rollups"):
+    try:
+        with st.spinner("Rebuilding daily_rollups..."):
+            rows = rebuild_rollups()
+        invalidate()
+        st.success(f"✅ Rebuilt daily_rollups with {rows} rows.")
+    except Exception as e:
+        st.error(f"❌ Failed to rebuild rollups: {e}")
+
+# 🧬 Normalize field types of documents uploaded before the schema was enforced
+st.subheader("🧬 Normalize Stored Field Types")
+st.caption(
+    "Converts sample_date to a real date, value/x/y to numbers and adds the detected flag and ISO week key. "
+    "Safe to run repeatedly."
+)
+if st.button("Normalize Documents"):
+    try:
+        with st.spinner("Normalizing documents..."):
+            modified = normalize_documents()
+            rebuild_rollups()
+        invalidate()
+        st.success(f"✅ Normalized {modified} documents.")
+    except Exception as e:
+        st.error(f"❌ Failed to normalize documents: {e}")
+
+# 🧹 Remove duplicate results left by earlier re-uploads
+st.subheader("🧹 Remove Duplicate Results")
+st.caption(
+    f"Keeps the newest row per {', '.join(NATURAL_KEY)}; needed once before the natural_key_unique index can be built."
+)
+if st.button("Remove Duplicates"):
+    try:
+        with st.spinner("Removing duplicates..."):
+            removed = deduplicate_samples()
+            if removed:
+                rebuild_rollups()
+        invalidate()
+        st.success(f"✅ Removed {removed} duplicate records.")
+    except Exception as e:
+        st.error(f"❌ Failed to remove duplicates: {e}")
+
+# 🗂️ Index status and bootstrap
+st.subheader("🗂️ Database Indexes")
+try:
+    if st.button("Create Missing Indexes"):
+        with st.spinner("Creating indexes..."):
+            st.dataframe(ensure_indexes(), width="stretch")
     else:
-        st.info("No location_code values found in database.")
+        st.dataframe(index_status(), width="stretch")
 except Exception as e:
-    st.error(f"Error loading location codes: {e}")
-
+    st.error(f"❌ Failed to read index status: {e}")
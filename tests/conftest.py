@@ -0,0 +1,15 @@
+"""Shared test setup.
+
+utils.db connects on import, so when mongomock is installed its in-memory
+client replaces pymongo.MongoClient before any test module imports utils.
+"""
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+if mongomock is not None:
+    import pymongo
+
+    _client = mongomock.MongoClient()
+    pymongo.MongoClient = lambda *args, **kwargs: _client
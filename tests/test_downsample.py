@@ -0,0 +1,34 @@
+"""downsample_figure() on figures shaped like the Trend Analysis charts.
+
+    python -m pytest tests
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from utils.downsample import downsample_figure
+
+
+def _bars_and_rate(n_days):
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2024-01-01", periods=n_days, freq="D")
+    total = rng.integers(20, 60, n_days)
+    detected = rng.binomial(total, 0.1)
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=dates, y=total, name="Total Samples"))
+    fig.add_trace(go.Scatter(x=dates, y=detected / total * 100, name="Detection Rate (%)", yaxis="y2"))
+    fig.update_layout(xaxis=dict(type="date", dtick="D1"))
+    return fig
+
+
+def test_traces_over_the_same_dates_keep_the_same_dates():
+    fig = downsample_figure(_bars_and_rate(730), max_points=100)
+    bars, rate = fig.data
+    assert len(bars.x) == 100
+    assert list(bars.x) == list(rate.x)
+
+
+def test_short_figures_are_untouched():
+    fig = downsample_figure(_bars_and_rate(60), max_points=100)
+    assert len(fig.data[0].x) == 60
+    assert fig.layout.xaxis.dtick == "D1"
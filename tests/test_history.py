@@ -0,0 +1,29 @@
+"""HoverHistory on map samples, including rows that have no point.
+
+    python -m pytest tests
+"""
+import pandas as pd
+
+from utils.history import DETECTED, NOT_DETECTED, HoverHistory
+
+
+def _samples():
+    return pd.DataFrame({
+        "points": ["1", "2", "2", None],
+        "sample_date": pd.to_datetime(["2025-01-01", "2025-01-01", "2025-01-02", "2025-01-02"]),
+        "value": [1.0, 0.0, 0.0, 1.0],
+    })
+
+
+def test_lines_per_point_newest_first():
+    history = HoverHistory(_samples()).for_date("2025-01-02", window=7)
+    assert history["1"] == f"2025-01-01: {DETECTED}"
+    assert history["2"].startswith(f"2025-01-02: {NOT_DETECTED}")
+
+
+def test_samples_without_a_point_are_left_out():
+    history = HoverHistory(_samples()).for_date("2025-01-02", window=7)
+    assert list(history.index) == ["1", "2"]
+    assert history.index.is_unique
+    # Mapping onto the map's points must not hit a duplicate label
+    assert pd.Series(["1", "2"]).map(history).notna().all()
@@ -0,0 +1,77 @@
+"""IncrementalFrame against an in-memory mongomock database.
+
+    python -m pytest tests
+"""
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+# conftest.py swaps in the mongomock client before utils.db is imported
+pytest.importorskip("mongomock")
+
+from utils.db import bump_data_version, db, find_frame  # noqa: E402
+from utils.incremental import IncrementalFrame  # noqa: E402
+
+COLUMNS = ("sample_date", "points", "value", "fresh_smoked")
+
+
+def _docs(start, n):
+    return [
+        {
+            "sample_date": datetime(2025, 1, 1) + timedelta(days=i % 30),
+            "points": str(i),
+            "value": float(i % 2),
+            "fresh_smoked": "Fresh" if i % 3 else "Smoking + Packing",
+        }
+        for i in range(start, start + n)
+    ]
+
+
+@pytest.fixture
+def samples():
+    for name in ("incremental_test", "meta"):
+        db.drop_collection(name)
+    collection = db["incremental_test"]
+    collection.insert_many(_docs(0, 300))
+    return collection
+
+
+def _assert_matches(loader, collection):
+    expected = find_frame(COLUMNS, collection=collection).sort_values("points", ignore_index=True)
+    actual = loader.refresh().sort_values("points", ignore_index=True)
+    pd.testing.assert_frame_equal(actual, expected, check_categorical=False)
+
+
+def test_append_loads_only_the_new_documents(samples):
+    loader = IncrementalFrame(COLUMNS, samples)
+    _assert_matches(loader, samples)
+    samples.insert_many(_docs(300, 50))
+    _assert_matches(loader, samples)
+    assert (loader.full_loads, loader.delta_loads) == (1, 1)
+    assert isinstance(loader.frame["fresh_smoked"].dtype, pd.CategoricalDtype)
+
+
+def test_in_place_modification_reloads(samples):
+    loader = IncrementalFrame(COLUMNS, samples)
+    loader.refresh()
+    samples.update_one({"points": "5"}, {"$set": {"value": 7.0}})
+    bump_data_version("samples")
+    _assert_matches(loader, samples)
+    assert loader.full_loads == 2
+
+
+def test_delete_below_the_watermark_reloads(samples):
+    loader = IncrementalFrame(COLUMNS, samples)
+    loader.refresh()
+    samples.delete_one({"points": "0"})
+    _assert_matches(loader, samples)
+    assert len(loader.frame) == 299
+    assert loader.full_loads == 2
+
+
+def test_unchanged_collection_is_not_reread(samples):
+    loader = IncrementalFrame(COLUMNS, samples)
+    loader.refresh()
+    loader.refresh()
+    assert (loader.full_loads, loader.delta_loads) == (1, 0)
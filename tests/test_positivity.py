@@ -0,0 +1,48 @@
+"""RollingPositivity against the per-date groupby the map pages used before it.
+
+    python -m pytest tests
+"""
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.positivity import RollingPositivity
+
+
+def _samples(n_points=20, n_days=120, seed=0):
+    """A few samples per day with unknown results and some rows without a point."""
+    rng = np.random.default_rng(seed)
+    n = n_points * n_days
+    points = rng.integers(n_points, size=n).astype(str).astype(object)
+    points[rng.random(n) < 0.05] = None
+    value = (rng.random(n) < 0.2).astype(float)
+    value[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame({
+        "points": points,
+        "sample_date": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(n_days, size=n), unit="D"),
+        "value": value,
+    })
+
+
+def _groupby_positivity(df, selected_date, window):
+    """The old per-date computation: mean of the known values per point in the window."""
+    window_data = df[(df["sample_date"] >= selected_date - timedelta(days=window - 1))
+                     & (df["sample_date"] <= selected_date)]
+    return (
+        window_data.groupby("points")["value"]
+        .agg(lambda vals: np.mean(vals.dropna()) if not vals.dropna().empty else np.nan)
+    )
+
+
+@pytest.mark.parametrize("window", [7, 28, 56])
+def test_matches_the_groupby_with_missing_points(window):
+    df = _samples()
+    engine = RollingPositivity(df)
+    for selected_date in pd.date_range("2025-01-01", periods=130, freq="9D"):
+        expected = _groupby_positivity(df, selected_date, window)
+        actual = engine.for_date(selected_date, window)
+        pd.testing.assert_series_equal(
+            actual.sort_index(), expected.sort_index(), check_names=False, check_index_type=False
+        )
@@ -0,0 +1,79 @@
+# --- Map sub_area to departments ---
+FRESH_AREAS = ['PRODUCTION', 'DEBONING', 'DESKINNING', 'INJECTOR', 'WASHER']
+SMOKING_PACKING_AREAS = ['ENTRANCE', 'LKPW1', 'LKPW2', 'CFS', 'OTHER']
+DEPARTMENTS = ['Fresh', 'Smoking + Packing']
+
+# Keys of one daily_rollups document
+ROLLUP_KEYS = ["sample_date", "sub_area", "before_during", "fresh_smoked", "location_code"]
+ROLLUP_INDEX_NAME = "rollup_keys_unique"
+
+# The detected flag as ingest derives it: from test_result, falling back to value
+LEGACY_DETECTED = {"$switch": {
+    "branches": [
+        {"case": {"$eq": ["$test_result", "Detected"]}, "then": True},
+        {"case": {"$eq": ["$test_result", "Not Detected"]}, "then": False},
+        {"case": {"$eq": ["$value", 1]}, "then": True},
+        {"case": {"$eq": ["$value", 0]}, "then": False},
+    ],
+    "default": None,
+}}
+
+
+def rollup_pipeline(output_collection=None):
+    """Aggregation grouping raw samples into daily_rollups documents.
+
+    Passing output_collection appends a $out stage that atomically replaces it.
+    """
+    pipeline = [
+        # Documents stored before the schema migration have no detected flag yet
+        {"$addFields": {"detected": {"$ifNull": ["$detected", LEGACY_DETECTED]}}},
+        {"$group": {
+            "_id": {key: f"${key}" for key in ROLLUP_KEYS},
+            # Attributes of the key, not part of it
+            "week": {"$last": "$week"},
+            # Only samples with a known result are counted
+            "total_samples": {"$sum": {"$cond": [{"$in": ["$detected", [True, False]]}, 1, 0]}},
+            "detected_tests": {"$sum": {"$cond": [{"$eq": ["$detected", True]}, 1, 0]}},
+        }},
+        {"$project": {
+            "_id": 0,
+            **{key: f"$_id.{key}" for key in ROLLUP_KEYS},
+            "week": 1,
+            "total_samples": 1,
+            "detected_tests": 1,
+        }},
+    ]
+    if output_collection:
+        pipeline.append({"$out": output_collection})
+    return pipeline
+
+
+def period_rollup_pipeline(match=None):
+    """Aggregation collapsing daily_rollups into ISO week x month counts per sub_area and before_during.
+
+    A week that straddles two months yields one row per month, so both the
+    weekly and the monthly totals stay exact.
+    """
+    pipeline = [{"$match": match}] if match else []
+    pipeline += [
+        {"$group": {
+            "_id": {
+                "iso_week": {"$dateToString": {"format": "%G-W%V", "date": "$sample_date"}},
+                "month": {"$dateToString": {"format": "%Y-%m", "date": "$sample_date"}},
+                "sub_area": "$sub_area",
+                "before_during": "$before_during",
+            },
+            "total_samples": {"$sum": "$total_samples"},
+            "detected_tests": {"$sum": "$detected_tests"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "iso_week": "$_id.iso_week",
+            "month": "$_id.month",
+            "sub_area": "$_id.sub_area",
+            "before_during": "$_id.before_during",
+            "total_samples": 1,
+            "detected_tests": 1,
+        }},
+    ]
+    return pipeline
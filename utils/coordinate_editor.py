@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+from utils.floor_map import FLOOR_MAPS, build_map_figure
+from utils.images import load_floor_plan
+from utils.locations import load_locations, location_grid, set_coordinates
+from utils.repository import invalidate_locations
+
+# Spacing (original image px) of the invisible click targets covering the floor plan
+PLACEMENT_GRID_STEP = 10
+DEFAULT_SNAP_RADIUS = 15
+PLACED_COLOR = "#1f77b4"
+SELECTED_COLOR = "#C00000"
+
+
+def placement_grid(width, height, step=PLACEMENT_GRID_STEP):
+    """Invisible markers every step px so a click anywhere on the plan selects a position."""
+    xs, ys = np.meshgrid(np.arange(0, width + 1, step), np.arange(0, height + 1, step))
+    return go.Scattergl(
+        x=xs.ravel(),
+        y=ys.ravel(),
+        mode="markers",
+        marker=dict(size=step, opacity=0),
+        hoverinfo="none",
+        showlegend=False,
+    )
+
+
+def picked_position(selection, height):
+    """(x, y) in original image pixels from a chart selection, or None.
+
+    A clicked point gives its own position; a box gives its centre.
+    """
+    if selection.get("points"):
+        point = selection["points"][-1]
+        x, y = point["x"], point["y"]
+    elif selection.get("box"):
+        box = selection["box"][-1]
+        x, y = sum(box["x"]) / 2, sum(box["y"]) / 2
+    else:
+        return None
+    # The figure draws y upwards from the bottom of the image
+    return float(x), float(height - y)
+
+
+def render_coordinate_editor():
+    """Click on a floor plan to place a location code, optionally snapping to the nearest point."""
+    floor_plan = st.selectbox("Floor Plan", list(FLOOR_MAPS), key="editor_floor_plan")
+    config = FLOOR_MAPS[floor_plan]
+    image_source, (width, height) = load_floor_plan(config["image_path"])
+    if image_source is None:
+        return
+
+    locations = load_locations()
+    if locations.empty:
+        st.info("No locations registered yet; build the registry below.")
+        return
+    on_plan = locations[locations["floor_plan"].eq(floor_plan)]
+    codes = sorted(on_plan.index, key=str) + sorted(locations.index.difference(on_plan.index), key=str)
+    selected_code = st.selectbox("Location Code to Place", codes, key="editor_location_code")
+
+    col1, col2 = st.columns(2)
+    snap = col1.toggle("Snap to nearest existing point", value=False)
+    snap_radius = col2.number_input("Snap radius (px)", min_value=1, value=DEFAULT_SNAP_RADIUS, step=1)
+
+    placed = on_plan.dropna(subset=["x", "y"])
+    points = pd.DataFrame({
+        "x": placed["x"],
+        "y": placed["y"],
+        "dot_color": np.where(placed.index == selected_code, SELECTED_COLOR, PLACED_COLOR),
+        "hover_text": "<b>Location Code:</b> " + placed.index.astype(str),
+    })
+    fig = build_map_figure(points, image_source, width, height, f"{config['title']}: click to place {selected_code}")
+    # Click targets go underneath the existing points so those stay clickable
+    fig.add_trace(placement_grid(width, height))
+    fig.data = fig.data[::-1]
+    fig.update_layout(clickmode="event+select", dragmode="select")
+
+    event = st.plotly_chart(
+        fig, width="stretch", key="coordinate_editor",
+        on_select="rerun", selection_mode=("points", "box")
+    )
+    position = picked_position(event.selection, height) if event else None
+    if position is None:
+        st.caption("Click on the floor plan (or drag a small box) to pick a position.")
+        return
+
+    x, y = position
+    nearest = location_grid(placed.drop(index=selected_code, errors="ignore")).nearest(x, y)
+    if nearest:
+        code, near_x, near_y, distance = nearest
+        st.write(f"Nearest existing point: **{code}** at ({near_x:.0f}, {near_y:.0f}), {distance:.1f} px away")
+        if snap and distance <= snap_radius:
+            x, y = near_x, near_y
+
+    st.write(f"New position for **{selected_code}**: ({x:.0f}, {y:.0f})")
+    if st.button(f"Save Coordinates for {selected_code}"):
+        set_coordinates(selected_code, round(x, 1), round(y, 1))
+        invalidate_locations()
+        st.success(f"✅ Updated coordinates for location_code = '{selected_code}'.")
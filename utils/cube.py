@@ -0,0 +1,204 @@
+import numpy as np
+import pandas as pd
+from utils.aggregations import DEPARTMENTS, FRESH_AREAS, SMOKING_PACKING_AREAS
+from utils.db import detection_values, iso_week_key
+
+# Dimensions of the detection count cube. iso_week and department follow from
+# sample_date and sub_area, so keeping them as keys does not grow the cube.
+CUBE_KEYS = ["sample_date", "iso_week", "sub_area", "before_during", "department"]
+CATEGORY_KEYS = ["iso_week", "sub_area", "before_during", "department"]
+COUNT_COLUMNS = ["total_samples", "detected_tests"]
+# Raw sample fields needed to build the cube; test_result and value only
+# matter for documents stored before the schema migration
+CUBE_SOURCE_COLUMNS = (
+    "sample_date", "iso_week", "sub_area", "before_during", "detected", "test_result", "value"
+)
+
+# The cube's sample_date is a day, or the first day of a week or month ("day",
+# "week", "month"). Longest span (days) drawn at each resolution before
+# switching to the next coarser one
+RESOLUTION_MAX_DAYS = {"day": 182, "week": 731}
+
+# Keys of every Trend Analysis summary table
+SUMMARY_KEYS = {
+    "daily": ["sample_date"],
+    "weekly": ["iso_week"],
+    "area": ["sub_area"],
+    "before_production": ["sample_date"],
+    "during_production": ["sample_date"],
+    "department": ["sample_date", "department"],
+}
+
+
+def department_of(sub_area):
+    """Vectorized sub_area -> department mapping."""
+    return pd.Series(
+        np.select(
+            [sub_area.isin(FRESH_AREAS), sub_area.isin(SMOKING_PACKING_AREAS)],
+            ['Fresh', 'Smoking + Packing'],
+            default='Unmapped'
+        ),
+        index=sub_area.index
+    )
+
+
+def _tidy(cube):
+    """Give a cube frame its canonical dtypes and column order."""
+    cube = cube[CUBE_KEYS + COUNT_COLUMNS].copy()
+    cube["sample_date"] = pd.to_datetime(cube["sample_date"]).dt.normalize()
+    for key in CATEGORY_KEYS:
+        cube[key] = cube[key].astype("category")
+    cube[COUNT_COLUMNS] = cube[COUNT_COLUMNS].astype("int64")
+    return cube.reset_index(drop=True)
+
+
+def build_count_cube(data):
+    """Collapse raw samples into per-key total and detected counts in one vectorized pass."""
+    if data.empty:
+        return _tidy(pd.DataFrame(columns=CUBE_KEYS + COUNT_COLUMNS))
+
+    sample_date = pd.to_datetime(data["sample_date"], errors="coerce").dt.normalize()
+    # The stored iso_week, computed here only for unmigrated documents
+    iso_week = data["iso_week"].astype(object) if "iso_week" in data.columns else None
+    if iso_week is None or iso_week.isna().any():
+        computed = iso_week_key(sample_date)
+        iso_week = computed if iso_week is None else iso_week.where(iso_week.notna(), computed)
+    detected = detection_values(data)
+    frame = pd.DataFrame({
+        "sample_date": sample_date,
+        "iso_week": iso_week.astype("category"),
+        "sub_area": data["sub_area"].astype("category"),
+        "before_during": data["before_during"].astype("category"),
+        "department": department_of(data["sub_area"]).astype("category"),
+        # Samples with a known result, and those detected
+        "total_samples": detected.notna(),
+        "detected_tests": detected.eq(1.0),
+    })
+    cube = (
+        frame.groupby(CUBE_KEYS, observed=True, dropna=False)[COUNT_COLUMNS]
+        .sum()
+        .reset_index()
+    )
+    return _tidy(cube)
+
+
+def cube_from_rollups(rollups):
+    """Build the cube from daily_rollups rows, which are already per-day counts."""
+    if rollups.empty:
+        return _tidy(pd.DataFrame(columns=CUBE_KEYS + COUNT_COLUMNS))
+
+    frame = rollups.reindex(columns=CUBE_KEYS + COUNT_COLUMNS)
+    frame["iso_week"] = iso_week_key(rollups["sample_date"])
+    frame["department"] = department_of(rollups["sub_area"])
+    cube = (
+        frame.groupby(CUBE_KEYS, dropna=False)[COUNT_COLUMNS]
+        .sum()
+        .reset_index()
+    )
+    return _tidy(cube)
+
+
+def resolution_for(start, end):
+    """Coarsest-needed resolution for a date span: daily up to ~6 months, weekly up to 2 years, then monthly."""
+    days = (pd.Timestamp(end) - pd.Timestamp(start)).days + 1
+    for resolution, max_days in RESOLUTION_MAX_DAYS.items():
+        if days <= max_days:
+            return resolution
+    return "month"
+
+
+def period_start(dates, resolution):
+    """First day of the week (Monday) or month containing each date; days are returned unchanged."""
+    dates = pd.to_datetime(dates).dt.normalize()
+    if resolution == "week":
+        return dates - pd.to_timedelta(dates.dt.weekday, unit="D")
+    if resolution == "month":
+        return dates.dt.to_period("M").dt.start_time
+    return dates
+
+
+def coarsen_cube(cube, resolution):
+    """Re-bucket a daily cube's sample_date to week or month starts, keeping iso_week exact."""
+    if resolution == "day" or cube.empty:
+        return cube
+    coarse = cube.assign(sample_date=period_start(cube["sample_date"], resolution))
+    coarse = (
+        coarse.groupby(CUBE_KEYS, observed=True, dropna=False)[COUNT_COLUMNS]
+        .sum()
+        .reset_index()
+    )
+    return _tidy(coarse)
+
+
+def cube_from_period_rollups(rows, resolution):
+    """Build a week- or month-resolution cube from load_period_rollups() rows."""
+    if rows.empty:
+        return _tidy(pd.DataFrame(columns=CUBE_KEYS + COUNT_COLUMNS))
+
+    frame = rows.dropna(subset=["iso_week", "month"]).copy()
+    if resolution == "week":
+        frame["sample_date"] = pd.to_datetime(frame["iso_week"] + "-1", format="%G-W%V-%u")
+    else:
+        frame["sample_date"] = pd.to_datetime(frame["month"], format="%Y-%m")
+    frame["department"] = department_of(frame["sub_area"])
+    cube = (
+        frame.groupby(CUBE_KEYS, dropna=False)[COUNT_COLUMNS]
+        .sum()
+        .reset_index()
+    )
+    return _tidy(cube)
+
+
+def filter_cube(cube, start=None, end=None, sub_areas=None, before_during=None, departments=None):
+    """Slice the cube; None leaves a dimension unfiltered."""
+    mask = np.ones(len(cube), dtype=bool)
+    if start is not None:
+        mask &= (cube["sample_date"] >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        mask &= (cube["sample_date"] <= pd.Timestamp(end)).to_numpy()
+    if sub_areas is not None:
+        mask &= cube["sub_area"].isin(sub_areas).to_numpy()
+    if before_during is not None:
+        mask &= cube["before_during"].isin(before_during).to_numpy()
+    if departments is not None:
+        mask &= cube["department"].isin(departments).to_numpy()
+    return cube[mask]
+
+
+def rollup(cube, keys):
+    """Sum the cube over every dimension not in keys."""
+    summary = (
+        cube.groupby(keys, observed=True)[COUNT_COLUMNS]
+        .sum()
+        .reset_index()
+    )
+    summary = summary[summary["total_samples"] > 0]
+    # Plain labels so chart code can treat them like ordinary columns
+    for key in keys:
+        if isinstance(summary[key].dtype, pd.CategoricalDtype):
+            summary[key] = summary[key].astype(object)
+    return summary.sort_values(keys).reset_index(drop=True)
+
+
+def cube_summary(cube, name):
+    """One Trend Analysis summary table (see SUMMARY_KEYS) as a slice of the cube."""
+    if name == "before_production":
+        cube = filter_cube(cube, before_during=["BP"])
+    elif name == "during_production":
+        cube = filter_cube(cube, before_during=["DP"])
+    elif name == "department":
+        cube = filter_cube(cube, departments=DEPARTMENTS)
+    return rollup(cube, SUMMARY_KEYS[name])
+
+
+def cube_summaries(cube):
+    """Every Trend Analysis summary table as a slice of the cube."""
+    return {name: cube_summary(cube, name) for name in SUMMARY_KEYS}
+
+
+def add_detection_rate(summary):
+    summary = summary.copy()
+    summary['detection_rate_percent'] = (
+        (summary['detected_tests'] / summary['total_samples']) * 100
+    ).round(1)
+    return summary
@@ -1,14 +1,217 @@
-
+from datetime import timedelta
 from pymongo import MongoClient
 from dotenv import load_dotenv
 import os
+import pandas as pd
+import streamlit as st
 
 load_dotenv()
-MONGO_URI = os.getenv("MONGO_URI")
 
-client = MongoClient(MONGO_URI)
-db = client["koral"]
+
+def get_setting(name, default=None):
+    """Read a setting from the environment (.env), falling back to Streamlit secrets."""
+    value = os.getenv(name)
+    if value is None:
+        try:
+            value = st.secrets.get(name)
+        except Exception:
+            # No secrets.toml, e.g. when run from the command line
+            value = None
+    return default if value is None else value
+
+
+# Connection pool and timeout settings, overridable via env vars or secrets
+MONGO_URI = get_setting("MONGO_URI")
+MONGO_MAX_POOL_SIZE = int(get_setting("MONGO_MAX_POOL_SIZE", 20))
+MONGO_SOCKET_TIMEOUT_MS = int(get_setting("MONGO_SOCKET_TIMEOUT_MS", 20000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(get_setting("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000))
+MONGO_READ_PREFERENCE = get_setting("MONGO_READ_PREFERENCE", "primary")
+MONGO_DB_NAME = get_setting("MONGO_DB_NAME", "koral")
+
+
+@st.cache_resource(show_spinner=False)
+def get_client():
+    """The single pooled MongoClient for this server process, shared by every page and session."""
+    return MongoClient(
+        MONGO_URI,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        readPreference=MONGO_READ_PREFERENCE,
+        appname="koral-dashboard",
+    )
+
+
+client = get_client()
+db = client[MONGO_DB_NAME]
 
 users_collection = db["users"]
 # listeria_collection = db["fresh"]
 listeria_collection = db["listeria"]
+daily_rollups_collection = db["daily_rollups"]
+# One document per location_code: where it sits on which floor plan
+locations_collection = db["locations"]
+# Bookkeeping documents, e.g. the write counters of data_fingerprint()
+meta_collection = db["meta"]
+DATA_VERSION_ID = "data_version"
+
+# 🧾 dtypes of the listeria fields the dashboards read
+DATE_COLUMNS = ["sample_date"]
+NUMERIC_COLUMNS = ["value", "x", "y", "week_num"]
+CATEGORY_COLUMNS = [
+    "test_code", "test_result", "unit", "fresh_smoked", "sub_area", "before_during", "week", "iso_week"
+]
+STRING_COLUMNS = ["points"]
+# Stored results as the boolean detected flag; anything else reads as unknown
+DETECTED_RESULTS = {"Detected": True, "Not Detected": False}
+
+
+def iso_week_key(dates):
+    """Year-aware ISO week labels ("2025-W02") that sort chronologically; None where the date is missing."""
+    dates = pd.to_datetime(dates, errors="coerce")
+    iso = dates.dt.isocalendar()
+    key = iso["year"].astype("string") + "-W" + iso["week"].astype("string").str.zfill(2)
+    return key.astype(object).where(dates.notna(), None)
+
+
+def detected_flag(test_result, value):
+    """True/False from test_result, falling back to value (1/0); None when neither says."""
+    flag = test_result.astype(object).map(DETECTED_RESULTS)
+    fallback = pd.to_numeric(value, errors="coerce").map({1: True, 0: False})
+    return flag.where(flag.notna(), fallback).astype(object).where(lambda f: f.notna(), None)
+
+
+def detection_values(df):
+    """1.0 (detected), 0.0 (not) or NaN (unknown) per sample, read from the stored detected flag.
+
+    Documents stored before the schema migration have no flag; for those it
+    is derived from test_result and value like ingest does.
+    """
+    missing = pd.Series(None, index=df.index, dtype=object)
+    flag = df["detected"].astype(object) if "detected" in df.columns else missing
+    legacy = detected_flag(df.get("test_result", missing), df.get("value", missing))
+    flag = flag.where(flag.notna(), legacy)
+    return flag.map({True: 1.0, False: 0.0}).astype(float)
+
+
+def typed_frame(docs, columns=None):
+    """DataFrame from listeria documents with proper dtypes.
+
+    When columns is given the frame has exactly those columns, even if no
+    document carried one of them.
+    """
+    df = pd.DataFrame(docs)
+
+    # Older uploads used "point" instead of "points"
+    if "point" in df.columns:
+        if "points" in df.columns:
+            df["points"] = df["points"].fillna(df["point"])
+            df = df.drop(columns=["point"])
+        else:
+            df = df.rename(columns={"point": "points"})
+    if columns is not None:
+        df = df.reindex(columns=list(columns))
+
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    for col in STRING_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(str)
+    return df
+
+
+def date_range_query(start=None, end=None):
+    """sample_date filter for an inclusive range of days; either bound may be None."""
+    bounds = {}
+    if start is not None:
+        bounds["$gte"] = pd.Timestamp(start).normalize().to_pydatetime()
+    if end is not None:
+        bounds["$lt"] = (pd.Timestamp(end).normalize() + timedelta(days=1)).to_pydatetime()
+    return {"sample_date": bounds} if bounds else {}
+
+
+def sample_date_bounds(collection=None):
+    """(first, last) sample_date in a collection as Timestamps, or (None, None) when it has none.
+
+    Two indexed lookups instead of reading the dates.
+    """
+    collection = listeria_collection if collection is None else collection
+    bounds = []
+    for direction in (1, -1):
+        doc = collection.find_one(
+            {"sample_date": {"$type": "date"}}, {"sample_date": 1, "_id": 0}, sort=[("sample_date", direction)]
+        )
+        bounds.append(pd.Timestamp(doc["sample_date"]) if doc else None)
+    return tuple(bounds)
+
+
+def bump_data_version(scope="samples"):
+    """Count a write to the samples ("samples") or the locations registry ("locations").
+
+    Call after writes that keep the document count and max _id, e.g. upserts,
+    coordinate edits and migrations; data_fingerprint() picks it up. A
+    "samples" bump also makes incremental loaders reload in full.
+    """
+    meta_collection.update_one({"_id": DATA_VERSION_ID}, {"$inc": {scope: 1}}, upsert=True)
+
+
+def write_counters():
+    """How often the samples and the locations registry were modified in place, as a dict."""
+    counters = meta_collection.find_one({"_id": DATA_VERSION_ID}) or {}
+    return {scope: counters.get(scope, 0) for scope in ("samples", "locations")}
+
+
+def latest_id(collection=None):
+    """Highest _id in a collection (newest ObjectId), or None when it is empty."""
+    collection = listeria_collection if collection is None else collection
+    latest = collection.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+    return latest["_id"] if latest else None
+
+
+def data_fingerprint():
+    """Cheap version string of the data: sample count, max _id and the write counters.
+
+    Three single-document lookups (collection metadata, the _id index and one
+    meta document), never a scan, so pages can check it on every rerun.
+    """
+    counters = write_counters()
+    return "-".join(str(part) for part in (
+        listeria_collection.estimated_document_count(),
+        latest_id(),
+        counters["samples"],
+        counters["locations"],
+    ))
+
+
+def concat_frames(frames):
+    """Concatenate typed frames; categories are merged so the columns stay categorical."""
+    df = pd.concat(frames, ignore_index=True)
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df
+
+
+def find_frame(columns=None, start=None, end=None, query=None, collection=None):
+    """Typed DataFrame of listeria samples, fetching only the given columns.
+
+    columns=None fetches every field except _id. start/end are pushed into
+    the query as an inclusive sample_date range.
+    """
+    collection = listeria_collection if collection is None else collection
+    query = {**(query or {}), **date_range_query(start, end)}
+    if columns is None:
+        projection = {"_id": 0}
+    else:
+        projection = {col: 1 for col in columns}
+        if "points" in projection:
+            projection["point"] = 1
+        projection["_id"] = 0
+    return typed_frame(list(collection.find(query, projection)), columns)
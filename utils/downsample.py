@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Most points a time-series trace sends to the browser
+MAX_POINTS_PER_TRACE = 400
+
+# Per-point trace properties that must be sliced along with x and y
+POINT_PROPERTIES = ("text", "customdata", "hovertext")
+
+
+def lttb(x, y, threshold):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    x must be sorted and numeric. The first and last points are always kept;
+    every bucket in between keeps the point that spans the largest triangle
+    with the previous pick and the mean of the next bucket, which preserves
+    peaks and dips far better than striding.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    kept = np.empty(threshold, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        following = slice(end, edges[i + 2] if i + 2 < len(edges) else n)
+        mean_x, mean_y = x[following].mean(), y[following].mean()
+        area = np.abs(
+            (x[previous] - mean_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (mean_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        kept[i + 1] = previous
+    return kept
+
+
+def _date_traces(fig):
+    """Bar/scatter traces of a figure whose x axis is a date axis."""
+    if fig.layout.xaxis.type != "date":
+        return []
+    return [trace for trace in fig.data if trace.type in ("bar", "scatter") and trace.x is not None]
+
+
+def downsample_figure(fig, max_points=MAX_POINTS_PER_TRACE):
+    """Cap date-axis traces at max_points with LTTB; shorter traces are left alone.
+
+    Traces drawn over the same dates keep the same dates: LTTB runs once on
+    the first of them (the totals in every Trend Analysis chart) and its
+    picks are applied to the rest, so bars and rate lines stay aligned.
+    """
+    picks = {}
+    for trace in _date_traces(fig):
+        if len(trace.x) <= max_points:
+            continue
+        x = pd.to_datetime(np.asarray(trace.x))
+        shared_x = x.asi8.tobytes()
+        if shared_x not in picks:
+            picks[shared_x] = lttb(x.asi8, trace.y, max_points)
+        kept = picks[shared_x]
+        updates = {"x": x[kept], "y": np.asarray(trace.y)[kept]}
+        for prop in POINT_PROPERTIES:
+            values = trace[prop]
+            if values is not None and not isinstance(values, str) and len(values) == len(x):
+                updates[prop] = np.asarray(values)[kept]
+        trace.update(updates)
+    if picks:
+        # A tick per day no longer fits; let Plotly space them
+        fig.update_xaxes(dtick=None)
+    return fig
+
+
+def to_webgl(fig):
+    """Redraw date-axis traces as Scattergl: lines stay lines, bars become filled steps."""
+    series = {id(trace) for trace in _date_traces(fig)}
+    traces = []
+    for trace in fig.data:
+        if id(trace) not in series:
+            traces.append(trace)
+            continue
+        common = dict(x=trace.x, y=trace.y, name=trace.name, yaxis=trace.yaxis, opacity=trace.opacity)
+        if trace.type == "bar":
+            traces.append(go.Scattergl(
+                **common,
+                mode="lines",
+                fill="tozeroy",
+                line=dict(shape="hv", width=1, color=trace.marker.color),
+            ))
+        else:
+            traces.append(go.Scattergl(
+                **common,
+                mode=trace.mode,
+                marker=trace.marker.to_plotly_json(),
+                line=dict(color=trace.line.color, width=trace.line.width),
+            ))
+    fig.data = []
+    fig.add_traces(traces)
+    return fig
@@ -0,0 +1,101 @@
+import csv
+import gzip
+import io
+import tempfile
+
+import pandas as pd
+from utils.db import DATE_COLUMNS, NUMERIC_COLUMNS, date_range_query, listeria_collection
+from utils.ingest import REQUIRED_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # Parquet export is offered only when pyarrow is installed
+    pa = pq = None
+
+# Field order of an exported file
+EXPORT_COLUMNS = sorted(REQUIRED_COLUMNS) + ["uploaded_by"]
+EXPORT_BATCH_SIZE = 5000
+
+EXPORT_FORMATS = {
+    "CSV": {"extension": "csv", "mime": "text/csv"},
+    "CSV (gzip)": {"extension": "csv.gz", "mime": "application/gzip"},
+}
+if pq is not None:
+    EXPORT_FORMATS["Parquet"] = {"extension": "parquet", "mime": "application/vnd.apache.parquet"}
+
+
+def export_query(start=None, end=None, departments=None):
+    """listeria filter for an optional inclusive date range and fresh_smoked departments."""
+    query = date_range_query(start, end)
+    if departments:
+        query["fresh_smoked"] = {"$in": list(departments)}
+    return query
+
+
+def _export_frame(docs):
+    """One batch of documents with the same columns and dtypes every time."""
+    df = pd.DataFrame(docs)
+    if "point" in df.columns:
+        # Older uploads used "point" instead of "points"
+        df["points"] = df["points"].fillna(df["point"]) if "points" in df.columns else df["point"]
+    df = df.reindex(columns=EXPORT_COLUMNS)
+    for col in EXPORT_COLUMNS:
+        if col in DATE_COLUMNS:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+        elif col in NUMERIC_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+        else:
+            df[col] = df[col].astype("string")
+    return df
+
+
+def iter_export_frames(query=None, batch_size=EXPORT_BATCH_SIZE, collection=None):
+    """Yield the matching samples batch by batch from a single cursor."""
+    collection = listeria_collection if collection is None else collection
+    cursor = collection.find(query or {}, {"_id": 0}).sort("_id", 1).batch_size(batch_size)
+    docs = []
+    for doc in cursor:
+        docs.append(doc)
+        if len(docs) == batch_size:
+            yield _export_frame(docs)
+            docs = []
+    if docs:
+        yield _export_frame(docs)
+
+
+def _parquet_schema():
+    return pa.schema([
+        (col, pa.timestamp("ms") if col in DATE_COLUMNS else pa.float64() if col in NUMERIC_COLUMNS else pa.string())
+        for col in EXPORT_COLUMNS
+    ])
+
+
+def write_export(fmt, query=None, batch_size=EXPORT_BATCH_SIZE, collection=None):
+    """Write matching samples in one of EXPORT_FORMATS to a temporary file.
+
+    Only one batch is held in memory at a time. Returns the file, rewound;
+    the caller closes it.
+    """
+    out = tempfile.TemporaryFile()
+    frames = iter_export_frames(query, batch_size, collection)
+
+    if fmt == "Parquet":
+        schema = _parquet_schema()
+        with pq.ParquetWriter(out, schema, compression="snappy") as writer:
+            for df in frames:
+                writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+    else:
+        raw = gzip.GzipFile(fileobj=out, mode="wb") if fmt == "CSV (gzip)" else out
+        text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        csv.writer(text, lineterminator="\n").writerow(EXPORT_COLUMNS)
+        for df in frames:
+            df.to_csv(text, index=False, header=False)
+        text.flush()
+        text.detach()
+        if raw is not out:
+            raw.close()
+
+    out.seek(0)
+    return out
@@ -0,0 +1,87 @@
+import json
+import threading
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+import streamlit as st
+from utils.db import get_setting
+
+# Memory cap of the serialized figures kept per server process
+FIGURE_CACHE_MB = int(get_setting("FIGURE_CACHE_MB", 128))
+
+
+class FigureCache:
+    """Serialized Plotly figures in least-recently-used order, capped at max_bytes of JSON."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key, payload):
+        # A figure bigger than the whole cache is simply not kept
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = payload
+            self.size += len(payload)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        return {"entries": len(self._entries), "MB": round(self.size / 2**20, 1), "hits": self.hits, "misses": self.misses}
+
+
+@st.cache_resource(show_spinner=False)
+def figure_cache():
+    """The figure cache shared by every session of this server process."""
+    return FigureCache(FIGURE_CACHE_MB * 2**20)
+
+
+def cache_key(chart_id, params, version):
+    """Hashable key; params may hold dicts, lists and dates."""
+    return chart_id, json.dumps(params, sort_keys=True, default=str), version
+
+
+def figure_from_json(payload):
+    # The JSON came from a validated figure, so skip Plotly's per-property validation
+    return go.Figure(json.loads(payload), _validate=False)
+
+
+def cached_figure(chart_id, params, version, build):
+    """Figure for (chart_id, params, version), calling build() only on a cache miss.
+
+    build may return None (nothing to draw), which is not cached.
+    """
+    cache = figure_cache()
+    key = cache_key(chart_id, params, version)
+    payload = cache.get(key)
+    if payload is None:
+        fig = build()
+        if fig is None:
+            return None
+        payload = fig.to_json()
+        cache.put(key, payload)
+    return figure_from_json(payload)
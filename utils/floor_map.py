@@ -0,0 +1,153 @@
+import plotly.graph_objects as go
+import streamlit as st
+from utils.figure_cache import cached_figure
+from utils.images import DEFAULT_RENDER_WIDTH, RENDER_WIDTHS, load_floor_plan
+from utils.positivity import DEFAULT_WINDOW, WINDOW_OPTIONS, determine_color
+from utils.profiler import render_profiler_panel, section, start_page
+from utils.locations import with_coordinates
+from utils.repository import (
+    data_version, load_hover_history, load_location_registry, load_map_samples, load_positivity_engine
+)
+
+# One entry per production area with a floor plan, keyed by its fresh_smoked value.
+# A new area only needs an entry here and a two-line page calling render_floor_map.
+FLOOR_MAPS = {
+    "Fresh": {
+        "image_path": "koral6.png",
+        "title": "Fresh Department",
+    },
+    "Smoking + Packing": {
+        "image_path": "smoked.png",
+        "title": "Smoked Department",
+    },
+}
+
+NO_DATA_COLOR = "#A9A9A9"  # gray
+
+
+def build_map_points(samples, positivity_ratio, history, window_days):
+    """Marker colour and hover text for the samples taken on one date."""
+    points = samples.copy()
+    if 'description' not in points.columns:
+        points['description'] = ""
+
+    points['history'] = points['points'].map(history).fillna("No history available")
+
+    positivity_colors = positivity_ratio.map(determine_color)
+    positivity_percents = (positivity_ratio * 100).round(1).astype(str) + '%'
+    points["dot_color"] = points["points"].map(positivity_colors).fillna(NO_DATA_COLOR)
+    points["positivity"] = points["points"].map(positivity_percents).fillna("N/A")
+
+    points['hover_text'] = (
+        "<b>Location Code:</b> " + points['location_code'].astype(str) + "<br>"
+        + f"<b>{window_days}-Day Positivity:</b> " + points['positivity'] + "<br>"
+        + f"<b>Last {window_days} Days:</b><br>&nbsp;&nbsp;" + points['history']
+    )
+    return points
+
+
+def build_map_figure(points, image_source, width, height, title):
+    """Scatter of the points over the floor plan; x/y are in original image pixels."""
+    fig = go.Figure()
+    fig.add_layout_image(
+        dict(
+            source=image_source,
+            xref="x",
+            yref="y",
+            x=0,
+            y=height,
+            sizex=width,
+            sizey=height,
+            sizing="stretch",
+            layer="below"
+        )
+    )
+
+    fig.add_trace(go.Scatter(
+        x=points['x'],
+        y=height - points['y'],
+        mode='markers',
+        marker=dict(
+            size=12,
+            color=points['dot_color'],
+            line=dict(width=1, color='DarkSlateGrey')
+        ),
+        customdata=points[['hover_text']],
+        hovertemplate="%{customdata[0]}<extra></extra>"
+    ))
+
+    fig.update_layout(
+        xaxis=dict(visible=False, range=[0, width]),
+        yaxis=dict(visible=False, range=[0, height]),
+        showlegend=False,
+        margin=dict(l=0, r=0, t=40, b=0),
+        title=title
+    )
+    return fig
+
+
+def render_floor_map(fresh_smoked):
+    """Whole floor-plan page for one production area (see FLOOR_MAPS)."""
+    config = FLOOR_MAPS[fresh_smoked]
+    start_page(f"{config['title']} map")
+    try:
+        _render_floor_map(config, fresh_smoked)
+    finally:
+        render_profiler_panel()
+
+
+def _render_floor_map(config, fresh_smoked):
+    # Load image for background (downscaled + cached; width/height stay in original pixels)
+    render_width = st.sidebar.selectbox(
+        "Floor Plan Resolution (px)", RENDER_WIDTHS, index=RENDER_WIDTHS.index(DEFAULT_RENDER_WIDTH)
+    )
+    with section("Floor plan image") as timing:
+        image_base64, (width, height) = load_floor_plan(config["image_path"], render_width)
+        timing.payload(image_base64)
+
+    # Samples for this area, sliced from the shared cache
+    with section("Load samples") as timing:
+        df = timing.frame(load_map_samples(fresh_smoked))
+    if df.empty:
+        st.warning("No data found for this department in MongoDB.")
+        return
+
+    available_dates = df['sample_day'].dropna().unique()
+    selected_date = st.selectbox("Select Date", sorted(available_dates, reverse=True))
+    window_days = st.selectbox(
+        "Positivity Window (days)", WINDOW_OPTIONS, index=WINDOW_OPTIONS.index(DEFAULT_WINDOW)
+    )
+    if not selected_date:
+        return
+
+    def build():
+        # Coordinates come from the locations registry, so edits show up without reloading samples
+        with section("Join coordinates") as timing:
+            samples = timing.frame(
+                with_coordinates(df[df['sample_day'] == selected_date], load_location_registry())
+            )
+        if samples.empty:
+            return None
+
+        # Both lookups are precomputed once per area and shared by every session
+        with section("Hover history"):
+            history = load_hover_history(fresh_smoked).for_date(selected_date, window_days)
+        with section("Rolling positivity"):
+            positivity_ratio = load_positivity_engine(fresh_smoked).for_date(selected_date, window_days)
+
+        points = build_map_points(samples, positivity_ratio, history, window_days)
+        return build_map_figure(
+            points, image_base64, width, height, f"{config['title']} Detections on {selected_date}"
+        )
+
+    # A date already drawn since the last data change comes straight from the figure cache
+    params = dict(date=selected_date, window_days=window_days, render_width=render_width)
+    with section("Build figure") as timing:
+        fig = cached_figure(f"map:{fresh_smoked}", params, data_version(), build)
+    if fig is None:
+        st.warning("No data with X and Y coordinates found for the selected date.")
+        return
+    # Measured after the block so serializing for the payload size is not timed
+    timing.figure(fig)
+    with section("Render chart"):
+        st.plotly_chart(fig, width="stretch")
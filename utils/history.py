@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+from utils.db import detection_values
+
+SEPARATOR = "<br>&nbsp;&nbsp;"
+DETECTED = '<b style="color:red">Detected</b>'
+NOT_DETECTED = '<b style="color:green">Not Detected</b>'
+UNKNOWN = 'Unknown'
+
+
+class HoverHistory:
+    """Per-point "Last N Days" hover lines for the floor-plan maps.
+
+    Every sample's "<date>: <result>" line is formatted once, and rows are
+    sorted by point and newest date first. A window lookup is then a boolean
+    mask plus one string join per point.
+    """
+
+    def __init__(self, df):
+        """df needs 'points', 'sample_date' and the 'detected' flag (older documents: 'value')."""
+        # A sample without a point has nowhere to go on the map (and would get category code -1)
+        df = df[df["sample_date"].notna() & df["points"].notna()]
+        dates = pd.to_datetime(df["sample_date"]).dt.normalize()
+        points = pd.Categorical(df["points"].astype(str))
+        days = dates.to_numpy(dtype="datetime64[D]").astype("int64")
+
+        values = detection_values(df).to_numpy()
+        labels = np.select([values == 1, values == 0], [DETECTED, NOT_DETECTED], default=UNKNOWN)
+        entries = dates.dt.strftime("%Y-%m-%d").to_numpy(dtype=object) + ": " + labels.astype(object)
+
+        # Stable sort: by point, then newest first
+        order = np.lexsort((-days, points.codes))
+        self.points = pd.Index(points.categories, name="points")
+        self._codes = points.codes[order]
+        self._days = days[order]
+        self._entries = entries[order]
+
+    def for_date(self, date, window=28):
+        """History per point for the window of days ending on date (inclusive)."""
+        end = pd.Timestamp(date).normalize().to_datetime64().astype("datetime64[D]").astype("int64")
+        mask = (self._days > end - window) & (self._days <= end)
+        codes = self._codes[mask]
+        entries = self._entries[mask]
+        if len(codes) == 0:
+            return pd.Series(dtype=object, index=pd.Index([], name="points"))
+
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        ends = np.r_[starts[1:], len(codes)]
+        joined = [SEPARATOR.join(entries[s:e]) for s, e in zip(starts, ends)]
+        return pd.Series(joined, index=self.points[codes[starts]])
@@ -0,0 +1,48 @@
+import base64
+import os
+from io import BytesIO
+
+import streamlit as st
+from PIL import Image, features
+
+# Widths (px) the floor plans are downscaled to; pick the one closest to the rendered chart
+RENDER_WIDTHS = [800, 1200, 1600]
+DEFAULT_RENDER_WIDTH = 1200
+IMAGE_QUALITY = 80
+
+
+def _encode(image, fmt, quality):
+    buffered = BytesIO()
+    if fmt == "JPEG" and image.mode != "RGB":
+        # JPEG has no alpha channel: flatten onto white
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.convert("RGBA").getchannel("A"))
+        image = background
+    image.save(buffered, format=fmt, quality=quality)
+    return buffered.getvalue()
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _encoded_floor_plan(image_path, mtime, max_width, fmt, quality):
+    # mtime is only part of the cache key, so replacing the file re-encodes it
+    image = Image.open(image_path)
+    size = image.size
+    if image.width > max_width:
+        height = round(image.height * max_width / image.width)
+        image = image.resize((max_width, height), Image.LANCZOS)
+    encoded = base64.b64encode(_encode(image, fmt, quality)).decode()
+    return f"data:image/{fmt.lower()};base64,{encoded}", size
+
+
+def load_floor_plan(image_path, max_width=DEFAULT_RENDER_WIDTH, fmt=None, quality=IMAGE_QUALITY):
+    """Floor plan as a compact data URI plus its ORIGINAL (width, height).
+
+    Sample x/y coordinates are in original pixels, so the figure should keep
+    using the original size for its axes and image box; the downscaled image
+    is stretched back over it and every point stays where it was.
+    """
+    if not os.path.exists(image_path):
+        st.error(f"Image not found at {image_path}")
+        return None, (0, 0)
+    fmt = fmt or ("WEBP" if features.check("webp") else "JPEG")
+    return _encoded_floor_plan(image_path, os.path.getmtime(image_path), max_width, fmt, quality)
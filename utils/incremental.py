@@ -0,0 +1,58 @@
+import threading
+
+from utils.db import concat_frames, find_frame, latest_id, listeria_collection, write_counters
+
+
+class IncrementalFrame:
+    """A listeria frame kept for the life of the server process and grown by _id watermark.
+
+    refresh() fetches only the documents with an _id above the highest one
+    loaded so far and appends them, so a weekly upload costs its own size
+    rather than the whole history. It reloads in full when documents were
+    modified or removed in place since the last load (upserts, dedup,
+    migrations bump the "samples" write counter), or when the row count no
+    longer adds up, e.g. after a delete from outside the app.
+    """
+
+    def __init__(self, columns=None, collection=None):
+        self.columns = columns
+        self.collection = listeria_collection if collection is None else collection
+        self.frame = None
+        self.watermark = None
+        self.modifications = None
+        self.full_loads = 0
+        self.delta_loads = 0
+        self._lock = threading.Lock()
+
+    def _load(self, query):
+        return find_frame(self.columns, query=query, collection=self.collection)
+
+    def _reload(self, latest, modifications):
+        # Bounded by latest so documents inserted meanwhile are left for the next delta
+        self.frame = self._load({"_id": {"$lte": latest}} if latest is not None else None)
+        self.watermark = latest
+        self.modifications = modifications
+        self.full_loads += 1
+
+    def refresh(self):
+        """The up-to-date frame; shared, so callers must treat it as read-only."""
+        with self._lock:
+            latest = latest_id(self.collection)
+            modifications = write_counters()["samples"]
+            if self.frame is None or self.watermark is None or modifications != self.modifications:
+                self._reload(latest, modifications)
+                return self.frame
+
+            frame = self.frame
+            if latest != self.watermark:
+                delta = self._load({"_id": {"$gt": self.watermark, "$lte": latest}})
+                frame = concat_frames([frame, delta])
+            # ObjectIds from other clients may land below the watermark, and
+            # deletes anywhere shrink the collection: both show up as a count
+            # mismatch, checked on every refresh
+            if len(frame) != self.collection.estimated_document_count():
+                self._reload(latest, modifications)
+            elif frame is not self.frame:
+                self.frame, self.watermark = frame, latest
+                self.delta_loads += 1
+            return self.frame
@@ -0,0 +1,146 @@
+import streamlit as st
+from pymongo import ASCENDING
+from pymongo.errors import PyMongoError
+from utils.aggregations import ROLLUP_INDEX_NAME, ROLLUP_KEYS
+from utils.db import (
+    client, daily_rollups_collection, get_setting, listeria_collection, locations_collection, users_collection
+)
+from utils.ingest import NATURAL_KEY
+
+# Every index the dashboards rely on, with the queries it serves
+INDEXES = [
+    {
+        "collection": listeria_collection,
+        "name": "fresh_smoked_1_sample_date_1",
+        "keys": [("fresh_smoked", ASCENDING), ("sample_date", ASCENDING)],
+        "options": {},
+        "serves": "Per-department reads and exports filtered by fresh_smoked and a date range",
+    },
+    {
+        "collection": locations_collection,
+        "name": "location_code_unique",
+        "keys": [("location_code", ASCENDING)],
+        "options": {"unique": True},
+        "serves": "Admin: X/Y coordinate updates and registry upserts on upload",
+    },
+    {
+        "collection": listeria_collection,
+        "name": "sample_date_1",
+        "keys": [("sample_date", ASCENDING)],
+        "options": {},
+        "serves": "Date-range reads (find_frame start/end)",
+    },
+    {
+        "collection": listeria_collection,
+        "name": "natural_key_unique",
+        "keys": [(field, ASCENDING) for field in NATURAL_KEY],
+        "options": {"unique": True},
+        "serves": "Upload: upserts of re-uploaded results (run Remove Duplicates first on old data)",
+    },
+    {
+        "collection": users_collection,
+        "name": "username_1",
+        "keys": [("username", ASCENDING)],
+        "options": {"unique": True},
+        "serves": "Login: authenticate() lookup by username",
+    },
+    {
+        "collection": daily_rollups_collection,
+        "name": ROLLUP_INDEX_NAME,
+        "keys": [(key, ASCENDING) for key in ROLLUP_KEYS],
+        "options": {"unique": True},
+        "serves": "Upload: $inc upserts into daily_rollups",
+    },
+]
+
+
+def _building(collection):
+    """Names of indexes being built on a collection (best effort, needs currentOp rights)."""
+    try:
+        ops = client.admin.aggregate([
+            {"$currentOp": {"allUsers": True}},
+            {"$match": {"command.createIndexes": collection.name}},
+        ])
+        return {index["name"] for op in ops for index in op["command"].get("indexes", [])}
+    except Exception:
+        return set()
+
+
+def index_status():
+    """One row per declared index: where it lives, what it serves and whether it exists yet.
+
+    status is "ready", "building", "missing" or "mismatch: ..." when an index
+    on the same keys exists with a different unique flag.
+    """
+    rows = []
+    existing = {}
+    for spec in INDEXES:
+        collection = spec["collection"]
+        if collection.name not in existing:
+            try:
+                info = collection.index_information()
+            except PyMongoError:
+                info = {}
+            existing[collection.name] = (
+                [(name, list(index["key"]), index.get("unique", False)) for name, index in info.items()],
+                _building(collection),
+            )
+        present, building = existing[collection.name]
+
+        keys = [tuple(key) for key in spec["keys"]]
+        unique = spec["options"].get("unique", False)
+        # Same keys but a different unique flag does not enforce what the spec declares;
+        # it has to be dropped by hand before ensure_indexes() can recreate it
+        matches = [
+            (name, index_unique) for name, index_keys, index_unique in present
+            if [tuple(key) for key in index_keys] == keys
+        ]
+        if any(index_unique == unique for _, index_unique in matches):
+            status = "ready"
+        elif matches:
+            name, index_unique = matches[0]
+            status = f"mismatch: {name} is {'unique' if index_unique else 'not unique'}"
+        elif spec["name"] in building:
+            status = "building"
+        else:
+            status = "missing"
+        rows.append({
+            "collection": collection.name,
+            "index": spec["name"],
+            "keys": ", ".join(field for field, _ in spec["keys"]),
+            "unique": unique,
+            "serves": spec["serves"],
+            "status": status,
+        })
+    return rows
+
+
+def ensure_indexes():
+    """Create every missing declared index; returns index_status() with failures reported per index."""
+    errors = {}
+    for spec, row in zip(INDEXES, index_status()):
+        if row["status"] != "missing":
+            continue
+        try:
+            spec["collection"].create_index(spec["keys"], name=spec["name"], **spec["options"])
+        except PyMongoError as e:
+            # e.g. duplicate usernames block the unique index; keep going with the rest
+            errors[spec["name"]] = str(e)
+
+    rows = index_status()
+    for row in rows:
+        if row["index"] in errors:
+            row["status"] = f"failed: {errors[row['index']]}"
+    return rows
+
+
+@st.cache_resource(show_spinner=False)
+def ensure_indexes_once():
+    """Bootstrap indexes once per server process (disable with MONGO_CREATE_INDEXES=false)."""
+    if str(get_setting("MONGO_CREATE_INDEXES", "true")).lower() not in ("1", "true", "yes"):
+        return []
+    try:
+        return ensure_indexes()
+    except PyMongoError:
+        # Never block the dashboards on index creation; the Admin page can retry
+        return []
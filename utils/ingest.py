@@ -0,0 +1,282 @@
+import time
+import warnings
+
+import pandas as pd
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from utils.db import detected_flag, iso_week_key, listeria_collection
+from utils.locations import register_locations
+from utils.rollups import apply_upload
+
+# ✅ Columns every results file must have
+REQUIRED_COLUMNS = {
+    "sample_code", "sample_description", "translated_description", "test_code", "test_result", "unit",
+    "analytical_report_code", "sample_date", "location_code", "fresh_smoked", "sub_area",
+    "before_during", "value", "week_num", "week", "x", "y", "points"
+}
+NUMERIC_FIELDS = ["value", "week_num", "x", "y"]
+# Fields normalize_fields() writes; together they are the stored schema
+SCHEMA_FIELDS = ["sample_date", *NUMERIC_FIELDS, "detected", "iso_week"]
+# One lab result: re-uploading it (e.g. a corrected report) replaces the stored row
+NATURAL_KEY = ["sample_code", "test_code", "analytical_report_code"]
+SAMPLE_DATE_FORMAT = "%d-%m-%Y"
+# MongoDB's error code for a write that violates a unique index
+DUPLICATE_KEY_ERROR = 11000
+
+DEFAULT_CHUNK_ROWS = 5000
+DEFAULT_BATCH_SIZE = 1000
+
+
+def missing_columns(columns):
+    return REQUIRED_COLUMNS - set(columns)
+
+
+def parse_sample_dates(values):
+    """Real datetimes from upload-format strings, ISO strings or datetimes; NaT when unparseable."""
+    dates = pd.to_datetime(values, format=SAMPLE_DATE_FORMAT, errors="coerce")
+    retry = dates.isna() & values.notna()
+    if retry.any():
+        dates[retry] = pd.to_datetime(values[retry].astype(str), format="ISO8601", errors="coerce")
+    return dates
+
+
+def normalize_fields(df):
+    """Coerce SCHEMA_FIELDS to their stored types: datetime, float, bool and ISO week key."""
+    df = df.copy()
+    # 🕓 Date parsing; unparseable dates are stored as null
+    sample_date = parse_sample_dates(df["sample_date"])
+    df["sample_date"] = sample_date.astype(object).where(sample_date.notna(), None)
+    for col in NUMERIC_FIELDS:
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype(float)
+    df["detected"] = detected_flag(df["test_result"], df["value"])
+    df["iso_week"] = iso_week_key(sample_date)
+    return df
+
+
+def prepare_frame(df, username):
+    """Validate and type-normalize uploaded rows. Raises ValueError when required columns are missing."""
+    missing = missing_columns(df.columns)
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(sorted(missing))}")
+
+    df = normalize_fields(df)
+
+    # 🧑 Add uploader info
+    df["uploaded_by"] = username
+    return df
+
+
+def to_records(df):
+    """Rows as Mongo-ready dicts, with NaN/NaT stored as null."""
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+def natural_key(record):
+    return tuple(record.get(field) for field in NATURAL_KEY)
+
+
+def _failed_indexes(error):
+    write_errors = error.details.get("writeErrors", [])
+    first = write_errors[0]["errmsg"] if write_errors else str(error)
+    return {err["index"] for err in write_errors}, first
+
+
+def _already_stored(error):
+    """Rows of a failed bulk write rejected only because their NATURAL_KEY is already stored."""
+    return sum(err.get("code") == DUPLICATE_KEY_ERROR for err in error.details.get("writeErrors", []))
+
+
+def insert_batch(records, collection=None):
+    """Unordered insert of one batch; rows whose NATURAL_KEY is already stored are skipped.
+
+    Returns (written records, replaced documents, error message or None);
+    plain inserts never replace anything.
+    """
+    collection = listeria_collection if collection is None else collection
+    try:
+        collection.insert_many(records, ordered=False)
+        return records, [], None
+    except BulkWriteError as e:
+        failed, first = _failed_indexes(e)
+        inserted = [record for i, record in enumerate(records) if i not in failed]
+        skipped = _already_stored(e)
+        if skipped == len(failed):
+            return inserted, [], f"{skipped} row(s) already stored, skipped"
+        return inserted, [], f"{len(failed)} row(s) rejected ({skipped} already stored), e.g. {first}"
+    except PyMongoError as e:
+        return [], [], str(e)
+
+
+def upsert_batch(records, collection=None):
+    """Unordered upsert of one batch keyed on NATURAL_KEY.
+
+    Same return shape as insert_batch; replaced holds the stored documents
+    that were overwritten, so rollups can take their counts back out. When a
+    key repeats inside the batch the last row wins.
+    """
+    collection = listeria_collection if collection is None else collection
+    records = list({natural_key(record): record for record in records}.values())
+    if not records:
+        return [], [], None
+    keys = [dict(zip(NATURAL_KEY, natural_key(record))) for record in records]
+
+    try:
+        existing = {
+            natural_key(doc): doc
+            for doc in collection.find({"$or": keys}, {"_id": 0})
+        }
+        collection.bulk_write(
+            [ReplaceOne(key, record, upsert=True) for key, record in zip(keys, records)],
+            ordered=False
+        )
+        failed, error = set(), None
+    except BulkWriteError as e:
+        failed, first = _failed_indexes(e)
+        error = f"{len(failed)} row(s) rejected, e.g. {first}"
+    except PyMongoError as e:
+        return [], [], str(e)
+
+    written = [record for i, record in enumerate(records) if i not in failed]
+    replaced = [existing[natural_key(record)] for record in written if natural_key(record) in existing]
+    return written, replaced, error
+
+
+def deduplicate_samples(collection=None):
+    """Delete all but the newest document per NATURAL_KEY, so the unique index can be built.
+
+    Returns the number of documents removed; rebuild the rollups afterwards.
+    """
+    collection = listeria_collection if collection is None else collection
+    duplicates = collection.aggregate([
+        {"$group": {
+            "_id": {field: f"${field}" for field in NATURAL_KEY},
+            "ids": {"$push": "$_id"},
+            "count": {"$sum": 1},
+        }},
+        {"$match": {"count": {"$gt": 1}}},
+    ], allowDiskUse=True)
+    stale = [doc_id for group in duplicates for doc_id in sorted(group["ids"])[:-1]]
+    removed = 0
+    for offset in range(0, len(stale), DEFAULT_BATCH_SIZE):
+        removed += collection.delete_many({"_id": {"$in": stale[offset:offset + DEFAULT_BATCH_SIZE]}}).deleted_count
+    return removed
+
+
+def _new_report():
+    """Counters of one upload, as returned by ingest_records() and ingest_csv()."""
+    return {
+        "rows_read": 0, "inserted": 0, "replaced": 0, "repeated": 0, "failed": 0, "batches": 0,
+        "errors": [], "seconds": 0.0,
+    }
+
+
+def _write_batches(records, report, batch_size=DEFAULT_BATCH_SIZE, upsert=False, on_batch=None):
+    """Write records batch by batch, keeping daily_rollups and the locations registry in step.
+
+    Every batch is recorded in report; a failing batch does not stop the
+    rest. With upsert=True a NATURAL_KEY repeated inside a batch keeps its
+    last row and the others are counted as repeated. on_batch() is called
+    after every batch.
+    """
+    write_batch = upsert_batch if upsert else insert_batch
+    for offset in range(0, len(records), batch_size):
+        batch = records[offset:offset + batch_size]
+        first_row = report["rows_read"] + 1
+        repeated = len(batch) - len({natural_key(record) for record in batch}) if upsert else 0
+        written, replaced, error = write_batch(batch)
+        if written:
+            try:
+                apply_upload(pd.DataFrame(written), pd.DataFrame(replaced))
+                register_locations(pd.DataFrame(written))
+            except PyMongoError as e:
+                error = f"{error + '; ' if error else ''}rollup/location update failed: {e}"
+
+        report["batches"] += 1
+        report["rows_read"] += len(batch)
+        report["inserted"] += len(written) - len(replaced)
+        report["replaced"] += len(replaced)
+        report["repeated"] += repeated
+        report["failed"] += len(batch) - repeated - len(written)
+        if error:
+            report["errors"].append({
+                "batch": report["batches"],
+                "rows": f"{first_row}-{report['rows_read']}",
+                "error": error,
+            })
+        if on_batch:
+            on_batch()
+    return report
+
+
+def ingest_records(records, batch_size=DEFAULT_BATCH_SIZE, upsert=False):
+    """Write prepared records (see prepare_frame and to_records) in batches; returns the upload report.
+
+    With upsert=True a NATURAL_KEY repeated anywhere in the records keeps
+    its last row, as if the file had been uploaded row by row.
+    """
+    report = _new_report()
+    start = time.perf_counter()
+    if upsert:
+        unique = list({natural_key(record): record for record in records}.values())
+        report["repeated"] = len(records) - len(unique)
+        records = unique
+    _write_batches(records, report, batch_size, upsert)
+    report["rows_read"] += report["repeated"]
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+
+def ingest_csv(file, username, chunk_rows=DEFAULT_CHUNK_ROWS, batch_size=DEFAULT_BATCH_SIZE,
+               on_progress=None, upsert=False):
+    """Stream a results CSV into MongoDB in chunks and batches.
+
+    With upsert=True rows replace stored rows with the same NATURAL_KEY
+    instead of being appended. A failing batch or a malformed line is
+    recorded in the report and the rest of the file is still loaded; a CSV
+    error the parser cannot skip ends the upload with a partial report
+    instead of an exception. on_progress(report, fraction)
+    is called after every batch, fraction being the share of the file read
+    so far (None if unknown).
+    """
+    report = _new_report()
+    size = getattr(file, "size", None)
+    start = time.perf_counter()
+
+    def show_progress():
+        report["seconds"] = time.perf_counter() - start
+        if on_progress:
+            fraction = min(file.tell() / size, 1.0) if size else None
+            on_progress(report, fraction)
+
+    # Lines with the wrong number of fields are skipped and reported, not fatal
+    reader = iter(pd.read_csv(
+        file, encoding="utf-8", encoding_errors="replace", chunksize=chunk_rows, on_bad_lines="warn"
+    ))
+    while True:
+        try:
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always", pd.errors.ParserWarning)
+                chunk = next(reader, None)
+        except (pd.errors.ParserError, ValueError) as e:
+            # Unrecoverable (e.g. an unterminated quote): keep what was loaded so far
+            report["errors"].append({"batch": None, "rows": f"after row {report['rows_read']}", "error": str(e)})
+            break
+        for warning in caught:
+            if issubclass(warning.category, pd.errors.ParserWarning):
+                for line in str(warning.message).strip().splitlines():
+                    report["failed"] += 1
+                    report["errors"].append({"batch": None, "rows": "skipped", "error": line})
+        if chunk is None:
+            break
+
+        try:
+            records = to_records(prepare_frame(chunk, username))
+        except ValueError as e:
+            # Same header for every chunk, so a schema error means the file is unusable
+            report["errors"].append({"batch": None, "rows": "header", "error": str(e)})
+            break
+
+        _write_batches(records, report, batch_size, upsert, show_progress)
+
+    report["seconds"] = time.perf_counter() - start
+    return report
@@ -0,0 +1,140 @@
+import pandas as pd
+from pymongo import UpdateOne
+from utils.db import bump_data_version, listeria_collection, locations_collection
+from utils.rollups import _mongo_value
+from utils.spatial import PointGrid
+
+# Fields of one locations document. department is the fresh_smoked value;
+# floor_plan is the FLOOR_MAPS key of the plan the location belongs to.
+LOCATION_FIELDS = ["location_code", "x", "y", "sub_area", "department", "floor_plan"]
+# Columns of a bulk coordinate file
+COORDINATE_COLUMNS = ["location_code", "x", "y"]
+
+
+def _location_rows(df):
+    """Latest known attributes per location_code in a frame of samples."""
+    samples = df.dropna(subset=["location_code"])
+    if samples.empty:
+        return []
+    latest = samples.groupby("location_code", sort=False).agg(
+        x=("x", "last"), y=("y", "last"), sub_area=("sub_area", "last"), department=("fresh_smoked", "last")
+    ).reset_index()
+    latest["floor_plan"] = latest["department"]
+    return [
+        {field: _mongo_value(row[field]) for field in LOCATION_FIELDS}
+        for row in latest.to_dict(orient="records")
+    ]
+
+
+def register_locations(df):
+    """Add location codes seen in uploaded samples to the registry.
+
+    Locations already registered keep their (possibly edited) attributes.
+    Returns the number of new locations.
+    """
+    operations = [
+        UpdateOne({"location_code": row["location_code"]}, {"$setOnInsert": row}, upsert=True)
+        for row in _location_rows(df)
+    ]
+    if not operations:
+        return 0
+    return locations_collection.bulk_write(operations, ordered=False).upserted_count
+
+
+def set_coordinates(location_code, x, y):
+    """Move one location; every sample taken there follows without being rewritten."""
+    return locations_collection.update_one(
+        {"location_code": location_code},
+        {"$set": {"x": x, "y": y}},
+        upsert=True
+    ).matched_count
+
+
+def read_coordinates_csv(file):
+    """Parse a location_code,x,y file into (valid rows, rejected rows).
+
+    Raises ValueError when a column is missing. Rows without a code or with
+    non-numeric/negative coordinates are rejected; a repeated code keeps its
+    last row.
+    """
+    df = pd.read_csv(file, encoding="utf-8", encoding_errors="replace", dtype={"location_code": str})
+    df.columns = df.columns.str.strip().str.lower()
+    missing = set(COORDINATE_COLUMNS) - set(df.columns)
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(sorted(missing))}")
+
+    df = df[COORDINATE_COLUMNS].copy()
+    df["location_code"] = df["location_code"].str.strip()
+    for col in ("x", "y"):
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    valid = df["location_code"].fillna("").ne("") & df["x"].ge(0) & df["y"].ge(0)
+    return df[valid].drop_duplicates("location_code", keep="last").reset_index(drop=True), df[~valid]
+
+
+def set_coordinates_many(df):
+    """Apply a frame of location_code, x, y in a single bulk_write; returns (updated, added)."""
+    operations = [
+        UpdateOne(
+            {"location_code": row["location_code"]},
+            {"$set": {"x": float(row["x"]), "y": float(row["y"])}},
+            upsert=True
+        )
+        for row in df[COORDINATE_COLUMNS].to_dict(orient="records")
+    ]
+    if not operations:
+        return 0, 0
+    result = locations_collection.bulk_write(operations, ordered=False)
+    return result.matched_count, result.upserted_count
+
+
+def location_grid(locations):
+    """PointGrid over the locations that have coordinates, labelled by location_code."""
+    placed = locations.dropna(subset=["x", "y"])
+    return PointGrid(placed["x"], placed["y"], placed.index)
+
+
+def build_locations():
+    """(Re)build the registry from the coordinates copied onto samples, newest sample winning.
+
+    Run once to migrate; returns the number of locations.
+    """
+    fields = ["location_code", "x", "y", "sub_area", "fresh_smoked"]
+    docs = listeria_collection.find(
+        {"location_code": {"$ne": None}}, {field: 1 for field in fields}
+    ).sort("_id", 1)
+    rows = _location_rows(pd.DataFrame(list(docs)).reindex(columns=fields))
+    if rows:
+        locations_collection.bulk_write(
+            [UpdateOne({"location_code": row["location_code"]}, {"$set": row}, upsert=True) for row in rows],
+            ordered=False
+        )
+    return len(rows)
+
+
+def load_locations():
+    """The registry as a DataFrame indexed by location_code."""
+    df = pd.DataFrame(list(locations_collection.find({}, {"_id": 0}))).reindex(columns=LOCATION_FIELDS)
+    df["x"] = pd.to_numeric(df["x"], errors="coerce")
+    df["y"] = pd.to_numeric(df["y"], errors="coerce")
+    return df.set_index("location_code")
+
+
+def with_coordinates(samples, locations):
+    """Join registry coordinates onto samples, dropping samples that have none.
+
+    Samples whose code is not registered yet fall back to their own x/y.
+    """
+    registry = locations.reindex(samples["location_code"].astype(object))
+    points = samples.copy()
+    points["x"] = registry["x"].to_numpy()
+    points["y"] = registry["y"].to_numpy()
+    if "x" in samples.columns and "y" in samples.columns:
+        points["x"] = points["x"].fillna(samples["x"])
+        points["y"] = points["y"].fillna(samples["y"])
+    return points[points["x"].notna() & points["y"].notna()]
+
+
+if __name__ == "__main__":
+    # python -m utils.locations  -> build the locations registry from existing samples
+    print(f"Registered {build_locations()} locations")
+    bump_data_version("locations")
@@ -0,0 +1,45 @@
+import pandas as pd
+from pymongo import UpdateOne
+from utils.db import bump_data_version, listeria_collection
+from utils.ingest import DEFAULT_BATCH_SIZE, SCHEMA_FIELDS, normalize_fields, to_records
+from utils.rollups import rebuild_rollups
+
+# Fields read to recompute the schema (value/test_result feed the detected flag)
+SOURCE_FIELDS = ["sample_date", "value", "week_num", "x", "y", "test_result"]
+
+
+def normalize_documents(batch_size=DEFAULT_BATCH_SIZE, collection=None):
+    """Rewrite SCHEMA_FIELDS of every stored sample with the types ingest now enforces.
+
+    Safe to run repeatedly. Returns the number of documents modified; rebuild
+    the rollups afterwards, since sample dates may have changed.
+    """
+    collection = listeria_collection if collection is None else collection
+    cursor = collection.find({}, {field: 1 for field in SOURCE_FIELDS}).batch_size(batch_size)
+
+    modified = 0
+    docs = []
+    for doc in cursor:
+        docs.append(doc)
+        if len(docs) == batch_size:
+            modified += _normalize_batch(docs, collection)
+            docs = []
+    if docs:
+        modified += _normalize_batch(docs, collection)
+    return modified
+
+
+def _normalize_batch(docs, collection):
+    df = normalize_fields(pd.DataFrame(docs).reindex(columns=["_id", *SOURCE_FIELDS]))
+    operations = [
+        UpdateOne({"_id": record["_id"]}, {"$set": {field: record[field] for field in SCHEMA_FIELDS}})
+        for record in to_records(df)
+    ]
+    return collection.bulk_write(operations, ordered=False).modified_count
+
+
+if __name__ == "__main__":
+    # python -m utils.migrations  -> normalize stored field types, then rebuild daily_rollups
+    print(f"Normalized {normalize_documents()} documents")
+    print(f"Rebuilt daily_rollups: {rebuild_rollups()} rows")
+    bump_data_version("samples")
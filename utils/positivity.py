@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+from utils.db import detection_values
+
+WINDOW_OPTIONS = [7, 14, 28, 56]
+DEFAULT_WINDOW = 28
+
+
+def determine_color(pos_ratio):
+    if pos_ratio >= 0.5:
+        return "#8B0000"  # blood red
+    elif pos_ratio > 0.2:
+        return "#FF0000"  # red
+    elif pos_ratio > 0.0:
+        return "#FFBF00"  # amber
+    else:
+        return "#008000"  # green
+
+
+class RollingPositivity:
+    """Per-point positivity over a trailing window of days, for every date at once.
+
+    Samples are binned into a (point x day) grid and turned into prefix sums
+    along the day axis, so the totals for any window ending on any day are a
+    single subtraction. Looking up one date is then O(points).
+    """
+
+    def __init__(self, df):
+        """df needs 'points', 'sample_date' and the 'detected' flag (older documents: 'value')."""
+        # A sample without a point has nowhere to go on the map (and would get category code -1)
+        df = df[df["sample_date"].notna() & df["points"].notna()]
+        dates = pd.to_datetime(df["sample_date"]).dt.normalize()
+        points = pd.Categorical(df["points"].astype(str))
+
+        self.points = pd.Index(points.categories, name="points")
+        self.start = dates.min() if len(dates) else pd.Timestamp(0)
+        n_days = (dates.max() - self.start).days + 1 if len(dates) else 0
+
+        day_idx = (dates - self.start).dt.days.to_numpy()
+        point_idx = points.codes
+        values = detection_values(df).to_numpy()
+        known = ~np.isnan(values)
+
+        shape = (len(self.points), n_days)
+        rows = np.zeros(shape)      # samples of any kind
+        counted = np.zeros(shape)   # samples with a value
+        detected = np.zeros(shape)  # sum of values
+        np.add.at(rows, (point_idx, day_idx), 1)
+        np.add.at(counted, (point_idx[known], day_idx[known]), 1)
+        np.add.at(detected, (point_idx[known], day_idx[known]), values[known])
+
+        # Leading zero column so a window starting on day 0 needs no special case
+        pad = ((0, 0), (1, 0))
+        self._rows = np.pad(rows.cumsum(axis=1), pad)
+        self._counted = np.pad(counted.cumsum(axis=1), pad)
+        self._detected = np.pad(detected.cumsum(axis=1), pad)
+        self._ratios = {}
+
+    @property
+    def n_days(self):
+        return self._rows.shape[1] - 1
+
+    def _window_sums(self, cumulative, window):
+        end = np.arange(1, self.n_days + 1)
+        begin = np.maximum(end - window, 0)
+        return cumulative[:, end] - cumulative[:, begin]
+
+    def ratios(self, window=DEFAULT_WINDOW):
+        """(points x days) positivity matrix for a window length; computed once per window."""
+        if window not in self._ratios:
+            counted = self._window_sums(self._counted, window)
+            detected = self._window_sums(self._detected, window)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                ratio = np.where(counted > 0, detected / counted, np.nan)
+            sampled = self._window_sums(self._rows, window) > 0
+            self._ratios[window] = (ratio, sampled)
+        return self._ratios[window]
+
+    def _sums_at(self, cumulative, day, window):
+        """Window totals ending on any day, including days after the last sample."""
+        end = min(day + 1, self.n_days)
+        begin = min(max(day + 1 - window, 0), end)
+        return cumulative[:, end] - cumulative[:, begin]
+
+    def for_date(self, date, window=DEFAULT_WINDOW):
+        """Positivity per point for the window ending on date.
+
+        Points sampled in the window but without any known value get NaN;
+        points not sampled at all are left out.
+        """
+        day = (pd.Timestamp(date).normalize() - self.start).days
+        if self.n_days == 0 or day < 0:
+            return pd.Series(dtype=float, index=pd.Index([], name="points"))
+
+        if day < self.n_days:
+            ratio, sampled = self.ratios(window)
+            col, present = ratio[:, day], sampled[:, day]
+        else:
+            counted = self._sums_at(self._counted, day, window)
+            detected = self._sums_at(self._detected, day, window)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                col = np.where(counted > 0, detected / counted, np.nan)
+            present = self._sums_at(self._rows, day, window) > 0
+        return pd.Series(col[present], index=self.points[present])
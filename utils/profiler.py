@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.figure_cache import figure_cache
+
+# Opt-in page profiling for admins: wrap page sections in section() (or mark
+# the end of a script section with lap()), call start_page() at the top of a
+# page and render_profiler_panel() at the bottom. Disabled, both cost nothing.
+PROFILE_KEY = "profile_sections"
+HISTORY_SIZE = 200  # timings kept per page section for p50/p95
+
+_history = defaultdict(lambda: deque(maxlen=HISTORY_SIZE))
+_history_lock = threading.Lock()
+
+
+def is_admin():
+    return st.session_state.get("user", {}).get("role") == "admin"
+
+
+def enabled():
+    return is_admin() and st.session_state.get(PROFILE_KEY, False)
+
+
+class Section:
+    """Measurements of one page section: wall time, rows, DataFrame memory and figure payload."""
+
+    def __init__(self, name, active):
+        self.name = name
+        self.active = active
+        self.seconds = 0.0
+        self.docs = None
+        self.frame_bytes = None
+        self.payload_bytes = None
+
+    def frame(self, df):
+        """Record the row count and deep memory of a DataFrame produced by this section."""
+        if self.active and df is not None:
+            self.docs = len(df)
+            self.frame_bytes = int(df.memory_usage(deep=True).sum())
+        return df
+
+    def figure(self, fig):
+        """Record the JSON size of a Plotly figure, i.e. what is sent to the browser.
+
+        Serializing takes time itself, so call it after the timed block.
+        """
+        if self.active and fig is not None:
+            self.payload_bytes = (self.payload_bytes or 0) + len(fig.to_json())
+        return fig
+
+    def payload(self, data):
+        """Record the size of a string/bytes payload such as a data URI."""
+        if self.active and data is not None:
+            self.payload_bytes = (self.payload_bytes or 0) + len(data)
+        return data
+
+
+def _records():
+    return st.session_state.setdefault("_profile_records", [])
+
+
+def _finish(section):
+    _records().append(section)
+    st.session_state["_profile_mark"] = time.perf_counter()
+    with _history_lock:
+        _history[(st.session_state.get("_profile_page"), section.name)].append(section.seconds)
+
+
+def start_page(page):
+    """Start a new profile for this rerun of page."""
+    if enabled():
+        st.session_state["_profile_page"] = page
+        st.session_state["_profile_records"] = []
+        st.session_state["_profile_mark"] = time.perf_counter()
+
+
+@contextmanager
+def section(name):
+    """Time the wrapped block; the yielded Section can record frames and figures."""
+    current = Section(name, enabled())
+    if not current.active:
+        yield current
+        return
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.seconds = time.perf_counter() - start
+        _finish(current)
+
+
+def lap(name, frame=None, figure=None):
+    """Close a section of a linear page script: the time since the previous section or lap."""
+    if not enabled():
+        return
+    current = Section(name, True)
+    current.seconds = time.perf_counter() - st.session_state.get("_profile_mark", time.perf_counter())
+    current.frame(frame)
+    current.figure(figure)
+    _finish(current)
+
+
+def rolling_stats(page):
+    """p50/p95 wall time (ms) over the last HISTORY_SIZE runs of each section of page."""
+    with _history_lock:
+        timings = {name: list(times) for (p, name), times in _history.items() if p == page}
+    return pd.DataFrame([
+        {
+            "section": name,
+            "runs": len(times),
+            "p50 ms": round(float(np.percentile(times, 50)) * 1000, 1),
+            "p95 ms": round(float(np.percentile(times, 95)) * 1000, 1),
+        }
+        for name, times in timings.items()
+    ])
+
+
+def render_profiler_panel():
+    """Admin-only sidebar expander with the opt-in switch, this rerun's sections and rolling p50/p95."""
+    if not is_admin():
+        return
+    with st.sidebar.expander("⏱️ Profiler", expanded=False):
+        st.toggle("Profile this page", key=PROFILE_KEY, help="Times each page section from the next rerun on.")
+        if not enabled() or "_profile_page" not in st.session_state:
+            return
+        records = _records()
+        st.caption(f"This rerun: {sum(r.seconds for r in records) * 1000:.0f} ms in {len(records)} sections")
+        st.dataframe(pd.DataFrame([
+            {
+                "section": r.name,
+                "ms": round(r.seconds * 1000, 1),
+                "rows": r.docs,
+                "frame KB": None if r.frame_bytes is None else round(r.frame_bytes / 1024, 1),
+                "payload KB": None if r.payload_bytes is None else round(r.payload_bytes / 1024, 1),
+            }
+            for r in records
+        ]), hide_index=True, width="stretch")
+        st.caption("Rolling (all sessions)")
+        st.dataframe(rolling_stats(st.session_state["_profile_page"]), hide_index=True, width="stretch")
+        st.caption("Figure cache (this server process)")
+        st.dataframe([figure_cache().stats()], hide_index=True, width="stretch")
@@ -0,0 +1,192 @@
+import pandas as pd
+import streamlit as st
+from pymongo.errors import PyMongoError
+from utils.cube import CUBE_SOURCE_COLUMNS, build_count_cube, coarsen_cube, cube_from_period_rollups, cube_from_rollups
+from utils.db import (
+    bump_data_version, daily_rollups_collection, data_fingerprint, find_frame, get_setting, sample_date_bounds
+)
+from utils.history import HoverHistory
+from utils.incremental import IncrementalFrame
+from utils.locations import load_locations
+from utils.positivity import RollingPositivity
+from utils.rollups import load_period_rollups, load_rollups, rebuild_rollups, rollups_built
+
+# ⏱️ How long a loaded frame is shared between sessions before Mongo is read again
+CACHE_TTL_SECONDS = 600
+# How long a server process trusts its last data fingerprint; writes from
+# this process show up at once, writes from elsewhere within this many seconds
+FINGERPRINT_TTL_SECONDS = 5
+
+# Only the fields each view needs are fetched from Mongo. x/y are only a
+# fallback for location codes missing from the locations registry, value
+# only for documents stored before the detected flag.
+MAP_COLUMNS = ("sample_date", "points", "detected", "value", "x", "y", "location_code", "fresh_smoked")
+
+# Every cached loader below takes the data fingerprint as its last argument,
+# so a changed collection is a cache miss rather than a stale dashboard.
+# The public load_* wrappers pass the current one.
+
+
+@st.cache_data(ttl=FINGERPRINT_TTL_SECONDS, show_spinner=False)
+def data_version():
+    """The data fingerprint (see utils.db.data_fingerprint), shared by every session for a few seconds."""
+    return data_fingerprint()
+
+
+@st.cache_resource(show_spinner=False)
+def incremental_frame(columns=None):
+    """The process-wide IncrementalFrame for a set of columns (None = all fields)."""
+    return IncrementalFrame(columns)
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=8, show_spinner=False)
+def _load_listeria(columns, version):
+    return incremental_frame(columns).refresh()
+
+
+def load_listeria(columns=None):
+    """Listeria samples (all fields, or only columns), shared by every session until the data changes."""
+    return _load_listeria(columns, data_version())
+
+
+@st.cache_resource(ttl=CACHE_TTL_SECONDS, max_entries=2, show_spinner=False)
+def _load_map_partitions(version):
+    # Only the samples added since the last load are read from Mongo
+    df = incremental_frame(MAP_COLUMNS).refresh()
+    if df.empty:
+        return {}
+    df = df.assign(sample_day=df["sample_date"].dt.date)
+    return {
+        area: part.reset_index(drop=True)
+        for area, part in df.groupby("fresh_smoked", observed=True)
+    }
+
+
+def load_map_partitions():
+    """Map samples from a single query, split by fresh_smoked; coordinates are joined per date.
+
+    Shared (not copied) between sessions, so callers must treat the frames as read-only.
+    """
+    return _load_map_partitions(data_version())
+
+
+def load_map_samples(fresh_smoked):
+    """Map samples for one department (e.g. "Fresh", "Smoking + Packing"); read-only."""
+    return load_map_partitions().get(fresh_smoked, pd.DataFrame())
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=4, show_spinner=False)
+def _load_location_registry(version):
+    return load_locations()
+
+
+def load_location_registry():
+    """The locations registry (coordinates and floor plan per location_code)."""
+    return _load_location_registry(data_version())
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=64, show_spinner=False)
+def _load_count_cube(from_rollups, start, end, resolution, version):
+    if from_rollups:
+        if resolution == "day":
+            return cube_from_rollups(load_rollups(start, end))
+        return cube_from_period_rollups(load_period_rollups(start, end), resolution)
+    return coarsen_cube(build_count_cube(find_frame(CUBE_SOURCE_COLUMNS, start, end)), resolution)
+
+
+def load_count_cube(from_rollups=True, start=None, end=None, resolution="day"):
+    """Detection count cube for an inclusive sample_date window, read from daily_rollups or the samples.
+
+    The window is pushed into the Mongo query. At "week"/"month" resolution
+    sample_date holds the period start; from daily_rollups the periods are
+    aggregated in Mongo, so the frame stays small however long the window.
+    """
+    return _load_count_cube(from_rollups, start, end, resolution, data_version())
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=4, show_spinner=False)
+def _rollups_available(version):
+    return rollups_built()
+
+
+def rollups_available():
+    """Whether daily_rollups covers the whole history; until then the cube is built from the samples."""
+    return _rollups_available(data_version())
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=4, show_spinner=False)
+def _load_date_bounds(from_rollups, version):
+    return sample_date_bounds(daily_rollups_collection if from_rollups else None)
+
+
+def load_date_bounds(from_rollups=True):
+    """(first, last) sample_date of the Trend Analysis source, without reading the dates."""
+    return _load_date_bounds(from_rollups, data_version())
+
+
+@st.cache_resource(ttl=CACHE_TTL_SECONDS, max_entries=4, show_spinner=False)
+def _load_positivity_engine(fresh_smoked, version):
+    return RollingPositivity(load_map_samples(fresh_smoked))
+
+
+def load_positivity_engine(fresh_smoked):
+    """Rolling positivity engine over one department's map samples, shared read-only by all sessions."""
+    return _load_positivity_engine(fresh_smoked, data_version())
+
+
+@st.cache_resource(ttl=CACHE_TTL_SECONDS, max_entries=4, show_spinner=False)
+def _load_hover_history(fresh_smoked, version):
+    return HoverHistory(load_map_samples(fresh_smoked))
+
+
+def load_hover_history(fresh_smoked):
+    """Preformatted hover history over one department's map samples, shared read-only by all sessions."""
+    return _load_hover_history(fresh_smoked, data_version())
+
+
+def invalidate(modified=True):
+    """Drop every cached frame; call after any write to the listeria collection.
+
+    modified says the write changed or removed existing documents (upserts,
+    dedup, migrations, rollup rebuilds), which forces a full reload of the
+    incremental frames; plain appends are picked up by count and max _id and
+    only load the new documents. Other server processes see the new
+    fingerprint within FINGERPRINT_TTL_SECONDS.
+    """
+    if modified:
+        bump_data_version("samples")
+    data_version.clear()
+    _load_listeria.clear()
+    _load_map_partitions.clear()
+    _load_count_cube.clear()
+    _load_date_bounds.clear()
+    _rollups_available.clear()
+    _load_positivity_engine.clear()
+    _load_hover_history.clear()
+    _load_location_registry.clear()
+
+
+def invalidate_locations():
+    """Record a write to the locations registry; call after a coordinate edit."""
+    bump_data_version("locations")
+    data_version.clear()
+    _load_location_registry.clear()
+
+
+@st.cache_resource(show_spinner=False)
+def ensure_rollups_once():
+    """Build daily_rollups from the existing history once per deployment (disable with MONGO_BOOTSTRAP_ROLLUPS=false).
+
+    Returns the number of rollup rows built, or None when nothing was done.
+    """
+    if str(get_setting("MONGO_BOOTSTRAP_ROLLUPS", "true")).lower() not in ("1", "true", "yes"):
+        return None
+    try:
+        if rollups_built():
+            return None
+        rows = rebuild_rollups()
+    except PyMongoError:
+        # Never block the dashboards; Trend Analysis reads the samples until the Admin page rebuilds
+        return None
+    invalidate()
+    return rows
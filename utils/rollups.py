@@ -0,0 +1,106 @@
+from datetime import datetime, timezone
+
+import pandas as pd
+from pymongo import ASCENDING, UpdateOne
+from utils.aggregations import ROLLUP_INDEX_NAME, ROLLUP_KEYS, period_rollup_pipeline, rollup_pipeline
+from utils.db import (
+    bump_data_version, daily_rollups_collection, date_range_query, detection_values, listeria_collection,
+    meta_collection
+)
+
+COUNT_FIELDS = ["total_samples", "detected_tests"]
+# meta document recording the last full rebuild; until it exists daily_rollups
+# may hold only the uploads since the upgrade, so readers fall back to the samples
+ROLLUPS_META_ID = "daily_rollups"
+
+
+def _mongo_value(value):
+    """Turn pandas/numpy scalars into values pymongo can encode and match on."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def rollup_increments(df, removed=None):
+    """$inc upserts for the rollup keys touched by new samples (and by the rows they replaced)."""
+    batch = df.assign(weight=1)
+    if removed is not None and not removed.empty:
+        # Replaced rows are taken back out of their old keys
+        batch = pd.concat([batch, removed.assign(weight=-1)], ignore_index=True)
+    if batch.empty:
+        return []
+
+    detected = detection_values(batch)
+    batch["total_samples"] = detected.notna().astype(int) * batch["weight"]
+    batch["detected_tests"] = detected.eq(1.0).astype(int) * batch["weight"]
+    # Attributes come from the new rows only
+    attributes = [col for col in ("week",) if col in df.columns]
+    for attr in attributes:
+        batch[attr] = batch[attr].where(batch["weight"] > 0)
+    grouped = batch.groupby(ROLLUP_KEYS, dropna=False, sort=False).agg(
+        **{field: (field, "sum") for field in COUNT_FIELDS},
+        **{attr: (attr, "last") for attr in attributes}
+    ).reset_index()
+
+    operations = []
+    for row in grouped.to_dict(orient="records"):
+        key = {field: _mongo_value(row[field]) for field in ROLLUP_KEYS}
+        update = {"$inc": {field: int(row[field]) for field in COUNT_FIELDS}}
+        attrs = {attr: _mongo_value(row[attr]) for attr in attributes if _mongo_value(row[attr]) is not None}
+        if attrs:
+            update["$set"] = attrs
+        operations.append(UpdateOne(key, update, upsert=True))
+    return operations
+
+
+def apply_upload(df, removed=None):
+    """Add freshly written samples to daily_rollups, minus any rows they replaced.
+
+    Returns the number of keys touched.
+    """
+    operations = rollup_increments(df, removed)
+    if operations:
+        daily_rollups_collection.bulk_write(operations, ordered=False)
+        if removed is not None and not removed.empty:
+            daily_rollups_collection.delete_many({"total_samples": {"$lte": 0}})
+    return len(operations)
+
+
+def rebuild_rollups():
+    """Recompute daily_rollups from the full sample history (for backfills)."""
+    list(listeria_collection.aggregate(rollup_pipeline(daily_rollups_collection.name)))
+    daily_rollups_collection.create_index(
+        [(key, ASCENDING) for key in ROLLUP_KEYS], name=ROLLUP_INDEX_NAME, unique=True
+    )
+    meta_collection.update_one(
+        {"_id": ROLLUPS_META_ID}, {"$set": {"rebuilt_at": datetime.now(timezone.utc)}}, upsert=True
+    )
+    return daily_rollups_collection.count_documents({})
+
+
+def rollups_built():
+    """Whether daily_rollups was ever rebuilt from the full history (and kept up to date since)."""
+    return meta_collection.find_one({"_id": ROLLUPS_META_ID}) is not None
+
+
+
+def load_rollups(start=None, end=None):
+    """Rollup rows as a DataFrame; start/end are pushed into the query as an inclusive sample_date range."""
+    df = pd.DataFrame(list(daily_rollups_collection.find(date_range_query(start, end), {"_id": 0})))
+    if not df.empty:
+        df["sample_date"] = pd.to_datetime(df["sample_date"], errors="coerce")
+    return df
+
+
+def load_period_rollups(start=None, end=None):
+    """Rollups collapsed in Mongo to ISO week x month rows (see period_rollup_pipeline)."""
+    pipeline = period_rollup_pipeline(date_range_query(start, end))
+    return pd.DataFrame(list(daily_rollups_collection.aggregate(pipeline)))
+
+
+if __name__ == "__main__":
+    # python -m utils.rollups  -> rebuild daily_rollups after a backfill
+    print(f"Rebuilt daily_rollups: {rebuild_rollups()} rows")
+    bump_data_version("samples")
@@ -0,0 +1,71 @@
+import math
+from collections import defaultdict
+
+import numpy as np
+
+
+class PointGrid:
+    """Uniform grid over labelled 2-D points for nearest-point lookups.
+
+    Points are bucketed into square cells, so a lookup only looks at the
+    cells in rings around the query until no closer point can exist. With a
+    few hundred swab points that is a handful of distance checks per click.
+    """
+
+    def __init__(self, x, y, labels, cell_size=None):
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.labels = list(labels)
+        if cell_size is None:
+            # About one point per cell on average
+            span = max(np.ptp(self.x), np.ptp(self.y), 1.0) if len(self.x) else 1.0
+            cell_size = span / max(math.sqrt(len(self.x)), 1.0)
+        self.cell_size = float(cell_size)
+
+        self._cells = defaultdict(list)
+        for i, cell in enumerate(zip(self._cell_of(self.x), self._cell_of(self.y))):
+            self._cells[cell].append(i)
+        self._bounds = None
+        if self._cells:
+            cols, rows = zip(*self._cells)
+            self._bounds = (min(cols), max(cols), min(rows), max(rows))
+
+    def __len__(self):
+        return len(self.labels)
+
+    def _cell_of(self, value):
+        return np.floor(np.asarray(value, dtype=float) / self.cell_size).astype(int)
+
+    def _ring(self, col, row, radius):
+        if radius == 0:
+            yield col, row
+            return
+        for dc in range(-radius, radius + 1):
+            yield col + dc, row - radius
+            yield col + dc, row + radius
+        for dr in range(-radius + 1, radius):
+            yield col - radius, row + dr
+            yield col + radius, row + dr
+
+    def nearest(self, x, y, max_distance=None):
+        """(label, x, y, distance) of the closest point, or None if there is none within max_distance."""
+        if not self.labels:
+            return None
+        col, row = int(self._cell_of(x)), int(self._cell_of(y))
+        min_col, max_col, min_row, max_row = self._bounds
+        last_ring = max(abs(col - min_col), abs(col - max_col), abs(row - min_row), abs(row - max_row))
+        best, best_distance = None, math.inf
+        # A point in ring r is at least (r - 1) cells away, so stop once that exceeds the best so far
+        for radius in range(last_ring + 1):
+            if (radius - 1) * self.cell_size > best_distance:
+                break
+            if max_distance is not None and (radius - 1) * self.cell_size > max_distance:
+                break
+            for cell in self._ring(col, row, radius):
+                for i in self._cells.get(cell, ()):
+                    distance = math.hypot(self.x[i] - x, self.y[i] - y)
+                    if distance < best_distance:
+                        best, best_distance = i, distance
+        if best is None or (max_distance is not None and best_distance > max_distance):
+            return None
+        return self.labels[best], float(self.x[best]), float(self.y[best]), best_distance
@@ -0,0 +1,379 @@
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.graph_objects as go
+from utils.cube import add_detection_rate, cube_summary, filter_cube
+from utils.downsample import downsample_figure, to_webgl
+from utils.figure_cache import cached_figure
+from utils.repository import load_count_cube
+
+# Process-flow order of the sub areas on the area chart
+AREA_ORDER = list(OrderedDict.fromkeys([
+    # Fresh
+    'PRODUCTION', 'DEBONING', 'DESKINNING', 'INJECTOR', 'WASHER',
+    # Smoking + Packing
+    'ENTRANCE', 'LKPW1', 'LKPW2', 'CFS', 'OTHER',
+]))
+
+DEPARTMENT_COLORS = {
+    'Fresh': '#70ad47',             # Green
+    'Smoking + Packing': '#4472c4'  # Blue
+}
+
+# Date-axis ticks at each cube resolution (the figures are laid out for daily ticks)
+DATE_TICKS = {
+    "day": dict(dtick='D1', tickformat='%d-%b'),
+    "week": dict(dtick=7 * 24 * 60 * 60 * 1000, tickformat='%d-%b-%y'),
+    "month": dict(dtick='M1', tickformat='%b %Y'),
+}
+
+DAILY_RANGESLIDER = dict(
+    visible=True,
+    thickness=0.02,
+    bgcolor='lightgrey',
+    bordercolor='grey',
+    borderwidth=1
+)
+
+
+def daily_totals_figure(daily_summary):
+    """Day-wise total vs detected samples as grouped bars."""
+    fig = go.Figure()
+
+    # Total Samples bar
+    fig.add_trace(go.Bar(
+        x=daily_summary['sample_date'],
+        y=daily_summary['total_samples'],
+        name='Total Samples',
+        marker_color='#a06cd5'  # Purple
+    ))
+
+    # Detected Samples bar
+    fig.add_trace(go.Bar(
+        x=daily_summary['sample_date'],
+        y=daily_summary['detected_tests'],
+        name='Detected Samples',
+        marker_color='#C00000'  # Red
+    ))
+
+    # Layout for grouped bars
+    fig.update_layout(
+        title='Day-wise Total vs Detected Samples',
+        xaxis=dict(
+            title='Sample Date',
+            type='date',
+            tickformat='%d-%b',
+            tickangle=-90,
+            dtick='D1',
+            rangeslider=dict(
+                visible=True,
+                thickness=0.01
+            )
+        ),
+        yaxis=dict(title='Number of Samples'),
+        barmode='group',  # Grouped side-by-side bars
+        bargap=0.2,
+        legend=dict(
+            orientation='h',
+            yanchor='bottom',
+            y=1.05,
+            xanchor='center',
+            x=0.5
+        ),
+        height=500,
+        margin=dict(l=60, r=40, t=60, b=140)
+    )
+    return fig
+
+
+def weekly_summary_figure(weekly_summary):
+    """Tests per ISO week with the detection rate on a second axis."""
+    summary = add_detection_rate(weekly_summary).rename(columns={'total_samples': 'total_tests'})
+    # iso_week keys ("2025-W02") already sort chronologically across years
+    summary = summary.sort_values(by='iso_week')
+
+    fig = go.Figure()
+
+    # Bar for total tests
+    fig.add_trace(go.Bar(
+        x=summary['iso_week'],
+        y=summary['total_tests'],
+        name='Total Tests',
+        marker_color='#dac3e8',
+        yaxis='y1'
+    ))
+
+    # Line for detection rate %
+    fig.add_trace(go.Scatter(
+        x=summary['iso_week'],
+        y=summary['detection_rate_percent'],
+        name='Detection Rate (%)',
+        mode='lines+markers',
+        marker=dict(color='#C00000'),
+        line=dict(color='#C00000'),
+        yaxis='y2'
+    ))
+
+    fig.update_layout(
+        title="Detection Summary by Week",
+        yaxis=dict(
+            title="Total/Detected Tests",
+            side="left",
+            range=[0, 500]
+        ),
+        yaxis2=dict(
+            title="Detection Rate (%)",
+            overlaying="y",
+            side="right",
+            range=[0, 100]
+        ),
+        legend=dict(x=0.2, xanchor="center", orientation="h"),
+        height=500,
+        bargap=0.3,        # Gap between weeks (x categories)
+        bargroupgap=0      # No gap between bars in the same group (Total vs Detected)
+    )
+    return fig
+
+
+def daily_detection_rate_figure(daily_summary):
+    """Tests per day with the detection rate on a second axis."""
+    summary = add_detection_rate(daily_summary).rename(columns={'total_samples': 'total_tests'})
+    summary = summary.sort_values(by='sample_date')
+
+    fig = go.Figure()
+
+    # Total tests (bar)
+    fig.add_trace(go.Bar(
+        x=summary['sample_date'],
+        y=summary['total_tests'],
+        name='Total Tests',
+        marker_color='#a06cd5',
+        yaxis='y1',
+        opacity=0.6
+    ))
+
+    # Detection rate (line)
+    fig.add_trace(go.Scatter(
+        x=summary['sample_date'],
+        y=summary['detection_rate_percent'],
+        name='Detection Rate (%)',
+        mode='lines+markers',
+        marker=dict(color='#C00000'),
+        line=dict(color='#C00000'),
+        yaxis='y2'
+    ))
+
+    fig.update_layout(
+        title="Detection Summary by Date",
+        xaxis=dict(
+            title='Sample Date',
+            type='date',
+            tickangle=-90,
+            tickformat='%d-%b',
+            dtick='D1',
+            rangeslider=DAILY_RANGESLIDER,
+            showgrid=True
+        ),
+        yaxis=dict(title='Total/Detected Tests', side='left'),
+        yaxis2=dict(title='Detection Rate (%)', overlaying='y', side='right', range=[0, 150]),
+        legend=dict(
+            orientation='h',
+            yanchor='bottom',
+            y=1.1,
+            xanchor='center',
+            x=0.5
+        ),
+        margin=dict(l=60, r=40, t=80, b=180),
+        height=600,
+        bargap=0.2,
+        bargroupgap=0,
+        barmode='overlay'  # Prevent bar grouping
+    )
+    return fig
+
+
+def area_figure(area_summary):
+    """Samples and detection rate per sub area, in process-flow order."""
+    area_summary = add_detection_rate(area_summary)
+    area_summary['sub_area'] = pd.Categorical(
+        area_summary['sub_area'],
+        categories=AREA_ORDER,
+        ordered=True
+    )
+    area_summary = area_summary.sort_values('sub_area')
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Bar(
+        x=area_summary['sub_area'],
+        y=area_summary['total_samples'],
+        name='Total Samples',
+        marker_color='#d2b7e5',
+        yaxis='y1'
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=area_summary['sub_area'],
+        y=area_summary['detection_rate_percent'],
+        name='Detection Rate (%)',
+        mode='lines+markers+text',
+        text=area_summary['detection_rate_percent'],
+        textposition='top center',
+        yaxis='y2',
+        line=dict(color='crimson', width=3)
+    ))
+
+    fig.update_layout(
+        title='# Samples vs % Detection Rate by Area (Process Flow)',
+        xaxis=dict(
+            title='Sub Area',
+            categoryorder='array',
+            categoryarray=AREA_ORDER
+        ),
+        yaxis=dict(title='Total Samples', side='left', showgrid=False),
+        yaxis2=dict(title='Detection Rate (%)', overlaying='y', side='right', range=[0, 100]),
+        legend=dict(orientation='h', yanchor='bottom', y=-0.3, xanchor='center', x=0.5),
+        height=500
+    )
+    return fig
+
+
+def production_figure(date_summary, title):
+    """Samples per day with the detection rate, for one production phase (BP or DP)."""
+    date_summary = add_detection_rate(date_summary).sort_values(by='sample_date')
+
+    fig = go.Figure()
+
+    # Bar for total samples
+    fig.add_trace(go.Bar(
+        x=date_summary['sample_date'],
+        y=date_summary['total_samples'],
+        name='Total Samples',
+        marker_color='#a06cd5',
+        yaxis='y1'
+    ))
+
+    # Line for detection rate
+    fig.add_trace(go.Scatter(
+        x=date_summary['sample_date'],
+        y=date_summary['detection_rate_percent'],
+        name='Detection Rate (%)',
+        mode='lines+markers',
+        line=dict(color='crimson', width=2),
+        yaxis='y2'
+    ))
+
+    # Layout with top legend and all date ticks
+    fig.update_layout(
+        title=title,
+        xaxis=dict(
+            title='Date',
+            type='date',
+            tickangle=-90,
+            tickformat='%d-%b',  # e.g., 12-May
+            dtick='D1',          # Force daily tick labels
+            rangeslider=DAILY_RANGESLIDER,
+            showgrid=True
+        ),
+        yaxis=dict(title='Total Samples', side='left'),
+        yaxis2=dict(title='Detection Rate (%)', overlaying='y', side='right', range=[0, 100]),
+        legend=dict(
+            orientation='h',
+            yanchor='bottom',
+            y=1.1,  # Above chart
+            xanchor='center',
+            x=0.5
+        ),
+        height=500
+    )
+    return fig
+
+
+def department_figure(department_summary):
+    """Daily detection rate per department, one line each."""
+    grouped = add_detection_rate(department_summary)
+    pivot = grouped.pivot(index='sample_date', columns='department', values='detection_rate_percent').fillna(0)
+
+    fig = go.Figure()
+    for dept in pivot.columns:
+        fig.add_trace(go.Scatter(
+            x=pivot.index,
+            y=pivot[dept],
+            name=f'{dept} Detection Rate (%)',
+            mode='lines+markers',
+            line=dict(color=DEPARTMENT_COLORS[dept], width=2),
+            marker=dict(size=6)
+        ))
+
+    fig.update_layout(
+        title="Detection Rate Trend by Department",
+        xaxis=dict(
+            title='Sample Date',
+            type='date',
+            tickangle=-90,
+            tickformat='%d-%b',
+            dtick='D1',
+            rangeslider=DAILY_RANGESLIDER,
+            showgrid=True
+        ),
+        yaxis=dict(title='Detection Rate (%)', range=[0, 100]),
+        legend=dict(
+            orientation='h',
+            yanchor='bottom',
+            y=1.1,
+            xanchor='center',
+            x=0.5
+        ),
+        height=500,
+        margin=dict(l=60, r=40, t=80, b=120)
+    )
+    return fig
+
+
+# One tab per chart: the cube summary it needs (see SUMMARY_KEYS) and how to draw it
+TREND_CHARTS = {
+    "Daily Totals": {"summary": "daily", "build": daily_totals_figure},
+    "Weekly": {"summary": "weekly", "build": weekly_summary_figure},
+    "Daily Detection Rate": {"summary": "daily", "build": daily_detection_rate_figure},
+    "By Area": {"summary": "area", "build": area_figure},
+    "Before Production": {
+        "summary": "before_production",
+        "build": lambda summary: production_figure(summary, '# Samples vs Detection Rate Before Production'),
+    },
+    "During Production": {
+        "summary": "during_production",
+        "build": lambda summary: production_figure(summary, '# Samples vs Detection Rate During Production'),
+    },
+    "By Department": {"summary": "department", "build": department_figure},
+}
+
+
+def set_resolution(fig, resolution):
+    """Retick the date axes of a figure drawn from a week- or month-resolution cube."""
+    if resolution != "day" and any(axis.type == 'date' for axis in fig.select_xaxes()):
+        fig.update_xaxes(selector=dict(type='date'), **DATE_TICKS[resolution])
+        fig.update_layout(title_text=f"{fig.layout.title.text} (by {resolution})")
+    return fig
+
+
+def build_trend_figure(chart, from_rollups, window, filters, webgl=False):
+    """One chart for the filtered cube.
+
+    window holds load_count_cube's start, end and resolution; filters holds
+    filter_cube's keyword arguments. Time series are capped at
+    MAX_POINTS_PER_TRACE points and drawn with WebGL when webgl is set.
+    """
+    spec = TREND_CHARTS[chart]
+    cube = filter_cube(load_count_cube(from_rollups, **window), **filters)
+    fig = spec["build"](cube_summary(cube, spec["summary"]))
+    fig = downsample_figure(set_resolution(fig, window["resolution"]))
+    return to_webgl(fig) if webgl else fig
+
+
+def load_trend_figure(chart, from_rollups, window, filters, version, webgl=False):
+    """build_trend_figure() through the figure cache, keyed on its arguments and version (data_version())."""
+    params = dict(from_rollups=from_rollups, window=window, filters=filters, webgl=webgl)
+    return cached_figure(
+        f"trend:{chart}", params, version,
+        lambda: build_trend_figure(chart, from_rollups, window, filters, webgl)
+    )